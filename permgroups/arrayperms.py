@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+try:
+    integer_types = (int, long)
+    range = xrange
+except NameError:   # Python 3
+    integer_types = (int,)
+
+import random
+from array import array
+from functools import reduce
+from permgroups import perms
+
+TYPECODE = "H"   # unsigned short, the degree is at most 65536
+
+
+class Perm(object):
+    """The class defining a perm stored in an array.
+
+    The array keeps images of the points 0, 1, ..., perm.max().
+    Trailing fixed points are dropped, so equal perms have equal arrays.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data=None):
+        """Load up a Perm instance."""
+        if data:
+            data = array(TYPECODE, data)
+            n = len(data)
+            while n > 1 and data[n - 1] == n - 1:
+                n = n - 1
+            del data[n:]
+        else:
+            data = array(TYPECODE, [0])
+        self.data = data
+
+    @classmethod
+    def from_perm(cls, perm):
+        """Return a perm converted from any perm with the list() method."""
+        return cls(data=perm.list())
+
+    def to_perm(self):
+        """Return the perm converted to the dict-based Perm."""
+        return perms.Perm(data=self.data)
+
+    def __repr__(self):
+        """Compute the string representation of the perm."""
+        words = ["Perm()"]
+        for cycle in self.cycles():
+            words.append(str(tuple(cycle)))
+        return "".join(words)
+
+    def __nonzero__(self):   # Py2
+        """Return always True so Perm() is True."""
+        return True
+
+    __bool__ = __nonzero__   # Py3
+
+    def __getitem__(self, key):
+        """Return the image of the point (points beyond the array are fixed)."""
+        if key < len(self.data):
+            return self.data[key]
+        return key
+
+    def __mul__(self, other):
+        """Return the product of the perms."""
+        if not isinstance(other, Perm):
+            return NotImplemented
+        a = self.data
+        b = other.data
+        if len(a) < len(b):   # trzeba dopisac punkty stale
+            a = a + array(TYPECODE, range(len(a), len(b)))
+        data = array(TYPECODE, [a[x] for x in b])
+        data.extend(a[len(b):])
+        return Perm(data=data)
+
+    def label(self, size=None):
+        """Return the string label for the perm."""
+        if size is None:
+            size = self.max() + 1
+        return "".join(perms.LETTERS[self[key]] for key in range(size))
+
+    def key(self):
+        """Return the bytes key for the perm (no limit for the size)."""
+        return perms.images_key(self.data.tolist())   # bytes(array) to bufor
+
+    def max(self):
+        """Return the highest element moved by the perm."""
+        return len(self.data) - 1
+
+    def min(self):
+        """Return the lowest element moved by the perm."""
+        for key, value in enumerate(self.data):
+            if key != value:
+                return key
+        return 0
+
+    def is_identity(self):
+        """Test if the perm is the identity perm."""
+        return len(self.data) == 1
+
+    def __invert__(self):   # ~perm
+        """Find the inverse of the perm."""
+        data = array(TYPECODE, self.data)
+        for key, value in enumerate(self.data):
+            data[value] = key
+        return Perm(data=data)
+
+    def __call__(self, *args):          # perm(a, b, ...)
+        """Return the product of the perm and the cycle (in place)."""
+        if not args:
+            return self
+        data = self.data
+        # Zmiana w miejscu, jak dla perms.Perm.
+        data.extend(range(len(data), max(args) + 1))
+        changed = dict()
+        n = len(args)
+        for i in range(n):
+            changed[args[i]] = data[args[(i + 1) % n]]
+        for key in changed:
+            data[key] = changed[key]
+        n = len(data)
+        while n > 1 and data[n - 1] == n - 1:
+            n = n - 1
+        del data[n:]
+        return self
+
+    def order(self):
+        """Return the order of the perm."""
+        alist = [len(cycle) for cycle in self.cycles()]
+        return reduce(perms.lcm, alist, 1)
+
+    def __eq__(self, other):
+        """Test if the perms are equal."""
+        if not isinstance(other, Perm):
+            return NotImplemented
+        return self.data == other.data
+
+    def __ne__(self, other):
+        """Test if the perms are not equal."""
+        if not isinstance(other, Perm):
+            return NotImplemented
+        return self.data != other.data
+
+    def __pow__(self, n):
+        """Find powers of the perm."""
+        data = self.list()
+        for cycle in self.cycles():
+            length = len(cycle)
+            for i, key in enumerate(cycle):
+                data[key] = cycle[(i + n) % length]
+        return Perm(data=data)
+
+    def list(self, size=None):
+        """Return the perm in array form."""
+        if size is None:
+            size = self.max() + 1
+        elif size < self.max() + 1:
+            raise ValueError("size is too small")
+        alist = self.data.tolist()
+        alist.extend(range(len(alist), size))
+        return alist
+
+    def cycles(self):
+        """Return a list of cycles for the perm."""
+        data = self.data
+        size = len(data)
+        unchecked = [True] * size
+        cyclic_form = list()
+        for i in range(size):
+            if unchecked[i]:
+                cycle = [i]
+                unchecked[i] = False
+                j = data[i]
+                while j != i:
+                    cycle.append(j)
+                    unchecked[j] = False
+                    j = data[j]
+                if len(cycle) > 1:
+                    cyclic_form.append(cycle)
+        return cyclic_form
+
+    def cycle_type(self):
+        """Return the lengths of cycles (without 1), in decreasing order."""
+        return tuple(sorted((len(cycle) for cycle in self.cycles()), reverse=True))
+
+    def parity(self):
+        """Return the parity of the perm (0 or 1)."""
+        return sum(len(cycle) - 1 for cycle in self.cycles()) % 2
+
+    def is_even(self):
+        """Test if the perm is even."""
+        return self.parity() == 0
+
+    def is_odd(self):
+        """Test if the perm is odd."""
+        return self.parity() == 1
+
+    def sign(self):
+        """Return the sign of the perm (+1 or -1)."""
+        return (1 if self.parity() == 0 else -1)
+
+    def support(self):
+        """Return the elements in permutation, P, for which P[i] != i."""
+        return [key for key, value in enumerate(self.data) if key != value]
+
+    def commutes_with(self, other):
+        """Test if the perms commute."""
+        for key in range(max(len(self.data), len(other.data))):
+            if self[other[key]] != other[self[key]]:
+                return False
+        return True
+
+    def conjugate(self, other):
+        """Return the conjugate self * other * ~self in a single pass."""
+        # (p*q*~p)[p[x]] = p[q[x]]
+        size = max(len(self.data), len(other.data))
+        data = array(TYPECODE, range(size))
+        for key, value in enumerate(other.data):
+            data[self[key]] = self[value]
+        return Perm(data=data)
+
+    def commutator(self, other):
+        """Find the commutator self * other * ~self * ~other."""
+        # [p,q][q[p[x]]] = p[q[x]]
+        size = max(len(self.data), len(other.data))
+        data = array(TYPECODE, range(size))
+        for key in range(size):
+            data[other[self[key]]] = self[other[key]]
+        return Perm(data=data)
+
+    @classmethod
+    def random(cls, size, rng=None):
+        """Return a random perm of the given size.
+        rng is a random.Random instance (the random module by default).
+        """
+        # Usage: Perm.random(size)
+        new_data = list(range(size))
+        (random if rng is None else rng).shuffle(new_data)
+        return cls(data=new_data)
+
+    @classmethod
+    def random_stream(cls, size, seed=None, count=None):
+        """The generator for random perms from an independent generator.
+        The same seed gives the same perms (use other seeds for other workers).
+        If count is None, the generator is infinite.
+        """
+        # Usage: for perm in Perm.random_stream(size, seed=worker): ...
+        rng = random.Random(seed)
+        new_data = list(range(size))
+        n = 0
+        while count is None or n < count:
+            # Tasowanie dowolnego ustawienia daje jednostajny rozklad.
+            rng.shuffle(new_data)
+            yield cls(data=new_data)
+            n = n + 1
+
+    @classmethod
+    def random_batch(cls, size, count, seed=None):
+        """Return a list of count random perms (see random_stream)."""
+        return list(cls.random_stream(size, seed, count))
+
+    def inversion_vector(self, size):
+        """Return the inversion vector of the perm."""
+        return perms.lehmer_code(self.list(size))
+
+    def rank_lex(self, size):
+        """Return the lexicographic rank of the perm."""
+        return perms.lex_rank(self.list(size))
+
+    @classmethod
+    def unrank_lex(cls, size, rank):
+        """Lexicographic perm unranking."""
+        # Usage: Perm.unrank_lex(size, rank)
+        return cls(data=perms.lex_unrank(size, rank))
+
+    def rank_mr(self, size):
+        """Myrvold and Ruskey rank of the perm."""
+        return perms.mr_rank(self.list(size))
+
+    @classmethod
+    def unrank_mr(cls, size, rank):
+        """Myrvold and Ruskey perm unranking."""
+        # Usage: Perm.unrank_mr(size, rank)
+        return cls(data=perms.mr_unrank(size, rank))
+
+    def __hash__(self):
+        """Hashable perms."""
+        return hash(self.data.tobytes())
+
+# EOF
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+
+try:
+    import numpy as np
+except ImportError:   # numpy is optional
+    np = None
+
+from permgroups.perms import Perm, LETTERS
+
+
+MAX_INT64_SIZE = 20   # 20! < 2**63 <= 21!
+
+
+def rank_dtype(size):
+    """Return the dtype for ranks of perms of the given size."""
+    return np.int64 if size <= MAX_INT64_SIZE else object
+
+
+def dtype_for(size):
+    """Return the smallest unsigned dtype for perms of the given size."""
+    if size <= 1 << 8:
+        return np.uint8
+    elif size <= 1 << 16:
+        return np.uint16
+    return np.uint32
+
+
+class PermBatch(object):
+    """The class defining k perms of size n stored in a (k, n) ndarray."""
+
+    def __init__(self, data):
+        """Load up a PermBatch instance."""
+        if np is None:
+            raise ImportError("PermBatch requires numpy")
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError("data must be a two-dimensional array")
+        self.data = data.astype(dtype_for(data.shape[1]), copy=False)
+
+    @classmethod
+    def from_perms(cls, perms, size=None):
+        """Return a batch made of the perms."""
+        perms = list(perms)
+        if size is None:
+            size = max([perm.max() for perm in perms] + [0]) + 1
+        if np is None:
+            raise ImportError("PermBatch requires numpy")
+        data = np.empty((len(perms), size), dtype=dtype_for(size))
+        for i, perm in enumerate(perms):
+            data[i] = perm.list(size)
+        return cls(data)
+
+    @classmethod
+    def identity(cls, size, count=1):
+        """Return a batch of identity perms."""
+        if np is None:
+            raise ImportError("PermBatch requires numpy")
+        return cls(np.tile(np.arange(size), (count, 1)))
+
+    @classmethod
+    def random(cls, size, count, seed=None):
+        """Return a batch of count random perms.
+        seed is passed to numpy.random.default_rng, e.g. [seed, worker].
+        """
+        if np is None:
+            raise ImportError("PermBatch requires numpy")
+        rng = np.random.default_rng(seed)
+        data = np.tile(np.arange(size, dtype=dtype_for(size)), (count, 1))
+        return cls(rng.permuted(data, axis=1, out=data))
+
+    @classmethod
+    def random_stream(cls, size, count, chunk=10000, seed=None):
+        """The generator for batches of random perms (chunk perms each).
+        The memory is bounded by chunk, the results depend only on seed.
+        """
+        if np is None:
+            raise ImportError("PermBatch requires numpy")
+        rng = np.random.default_rng(seed)
+        while count > 0:
+            k = min(chunk, count)
+            data = np.tile(np.arange(size, dtype=dtype_for(size)), (k, 1))
+            yield cls(rng.permuted(data, axis=1, out=data))
+            count = count - k
+
+    @property
+    def size(self):
+        """Return the size of the perms."""
+        return self.data.shape[1]
+
+    def __len__(self):
+        """Return the number of perms in the batch."""
+        return self.data.shape[0]
+
+    def __repr__(self):
+        """Compute the string representation of the batch."""
+        return "PermBatch({} perms of size {})".format(len(self), self.size)
+
+    def __getitem__(self, key):
+        """Return a perm (int key) or a new batch (slice or index array)."""
+        if isinstance(key, (int, np.integer)):
+            return Perm(data=self.data[key].tolist())
+        return PermBatch(self.data[key])
+
+    def __iter__(self):
+        """The generator for perms from the batch."""
+        for row in self.data.tolist():
+            yield Perm(data=row)
+
+    def to_perms(self, perm_class=Perm):
+        """Return the list of perms."""
+        return [perm_class(data=row) for row in self.data.tolist()]
+
+    def _array(self, perm):
+        """Return the perm as a row of the batch size."""
+        return np.array(perm.list(self.size), dtype=self.data.dtype)
+
+    def __mul__(self, other):
+        """Return the products of the perms (row by row or by a perm)."""
+        if isinstance(other, PermBatch):
+            if other.data.shape != self.data.shape:
+                raise ValueError("batches have different shapes")
+            return PermBatch(np.take_along_axis(self.data, other.data, axis=1))
+        return PermBatch(self.data[:, self._array(other)])
+
+    def outer(self, other):
+        """Return the batch of all products self[i] * other[j],
+        the row j * len(self) + i is self[i] * other[j].
+        """
+        data = self.data[:, other.data]   # data[i, j] = self[i] * other[j]
+        return PermBatch(data.transpose(1, 0, 2).reshape(-1, self.size))
+
+    def __rmul__(self, other):
+        """Return the products perm * batch."""
+        return PermBatch(self._array(other)[self.data])
+
+    def __invert__(self):   # ~batch
+        """Find the inverses of the perms."""
+        data = np.empty_like(self.data)
+        rows = np.arange(len(self))[:, None]
+        data[rows, self.data] = np.arange(self.size, dtype=self.data.dtype)
+        return PermBatch(data)
+
+    def __eq__(self, other):
+        """Test row by row if the perms are equal (return a bool array)."""
+        if isinstance(other, PermBatch):
+            return (self.data == other.data).all(axis=1)
+        return (self.data == self._array(other)).all(axis=1)
+
+    def __ne__(self, other):
+        """Test row by row if the perms are not equal."""
+        return ~(self == other)
+
+    __hash__ = None   # batches are mutable
+
+    def is_identity(self):
+        """Test row by row if the perms are the identity perm."""
+        return (self.data == np.arange(self.size)).all(axis=1)
+
+    def concatenate(self, other):
+        """Return a new batch with the rows of both batches."""
+        return PermBatch(np.concatenate([self.data, other.data]))
+
+    def _lengths(self):
+        """Return the list of perm.max() + 1 for the perms."""
+        moved = self.data != np.arange(self.size)
+        # Ostatni ruszany punkt w kazdym wierszu.
+        lengths = np.where(moved.any(axis=1),
+            self.size - np.argmax(moved[:, ::-1], axis=1), 1)
+        return lengths.tolist()
+
+    def keys(self):
+        """Return a list of bytes keys, one for each perm (see Perm.key)."""
+        # Klucze to fragmenty jednego bufora bytes (osobny bufor dla
+        # kazdej szerokosci), bez operacji numpy dla kazdego wiersza.
+        size = self.size
+        buffers = dict()
+        result = list()
+        for i, length in enumerate(self._lengths()):
+            width = 1 if length <= 1 << 8 else (2 if length <= 1 << 16 else 4)
+            buffer = buffers.get(width)
+            if buffer is None:
+                buffer = self.data.astype(dtype_for(length)).tobytes()
+                buffers[width] = buffer
+            start = i * size * width
+            result.append(buffer[start:start + length * width])
+        return result
+
+    def labels(self):
+        """Return a list of string labels (see Perm.label)."""
+        letters = np.frombuffer(LETTERS.encode("ascii"), dtype=np.uint8)
+        chars = letters[self.data]
+        return [row[:length].tobytes().decode("ascii")
+            for row, length in zip(chars, self._lengths())]
+
+    def unique(self):
+        """Return a new batch without repeated perms."""
+        return PermBatch(np.unique(self.data, axis=0))
+
+    def inversion_vectors(self):
+        """Return a (k, n) array of inversion vectors."""
+        lehmer = np.zeros(self.data.shape, dtype=np.int64)
+        for i in range(self.size - 1):
+            lehmer[:, i] = (self.data[:, i+1:] < self.data[:, i:i+1]).sum(axis=1)
+        return lehmer
+
+    def rank_lex(self):
+        """Return an array of lexicographic ranks of the perms."""
+        dtype = rank_dtype(self.size)
+        lehmer = self.inversion_vectors().astype(dtype)
+        ranks = np.zeros(len(self), dtype=dtype)
+        for i in range(self.size):   # zmodyfikowany horner
+            ranks = ranks * (self.size - i) + lehmer[:, i]
+        return ranks
+
+    @classmethod
+    def unrank_lex(cls, size, ranks):
+        """Return a batch of perms with the given lexicographic ranks."""
+        if np is None:
+            raise ImportError("PermBatch requires numpy")
+        ranks = np.array(ranks, dtype=rank_dtype(size))
+        lehmer = np.zeros((len(ranks), size), dtype=np.int64)
+        for i in range(2, size + 1):
+            lehmer[:, size - i] = ranks % i
+            ranks = ranks // i
+        if (ranks > 0).any():
+            raise ValueError("size is too small")
+        data = np.empty((len(ranks), size), dtype=dtype_for(size))
+        free = np.ones((len(ranks), size), dtype=bool)
+        rows = np.arange(len(ranks))
+        for i in range(size):
+            # Wybieramy wolna wartosc o numerze lehmer[:, i] (od zera).
+            counts = np.cumsum(free, axis=1)
+            values = np.argmax(counts > lehmer[:, i:i+1], axis=1)
+            data[:, i] = values
+            free[rows, values] = False
+        return cls(data)
+
+    def rank_mr(self):
+        """Return an array of Myrvold and Ruskey ranks of the perms."""
+        dtype = rank_dtype(self.size)
+        alist = self.data.astype(np.intp)
+        blist = (~self).data.astype(np.intp)
+        rows = np.arange(len(self))
+        ranks = np.zeros(len(self), dtype=dtype)
+        factor = 1
+        for n in range(self.size, 1, -1):
+            s = alist[:, n - 1].copy()
+            t = blist[:, n - 1].copy()
+            # swap(alist, n - 1, blist[n - 1]) dla wszystkich wierszy
+            alist[:, n - 1] = alist[rows, t]
+            alist[rows, t] = s
+            # swap(blist, s, n - 1)
+            blist[:, n - 1] = blist[rows, s]
+            blist[rows, s] = t
+            ranks = ranks + s.astype(dtype) * factor
+            factor *= n
+        return ranks
+
+    @classmethod
+    def unrank_mr(cls, size, ranks):
+        """Return a batch of perms with the given Myrvold and Ruskey ranks."""
+        if np is None:
+            raise ImportError("PermBatch requires numpy")
+        ranks = np.array(ranks, dtype=rank_dtype(size))
+        data = np.tile(np.arange(size, dtype=dtype_for(size)), (len(ranks), 1))
+        rows = np.arange(len(ranks))
+        for n in range(size, 0, -1):
+            items = (ranks % n).astype(np.intp)
+            ranks = ranks // n
+            s = data[rows, items].copy()
+            data[rows, items] = data[:, n - 1]
+            data[:, n - 1] = s
+        return cls(data)
+
+    def images(self, point):
+        """Return an array of images of the point."""
+        return self.data[:, point]
+
+    def orbit(self, point):
+        """Return a sorted list of images of the point."""
+        return np.unique(self.data[:, point]).tolist()
+
+# EOF
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+#
+# Benchmarks for groups. Usage: python3 -m permgroups.bench_groups
+
+import itertools
+import os
+import random
+import tempfile
+import time
+from permgroups.perms import Perm
+from permgroups import groups
+from permgroups import setsgroups
+from permgroups import simsgroups
+from permgroups.sampling import ProductReplacement
+from permgroups.batchperms import np
+from permgroups.bench_perms import RUBIK3
+
+# Rubik 2x2 (test_rubik2.py), the subgroup <R, D> of order 29160.
+RUBIK2 = [
+    Perm()(2,13,19,4)(3,11,0,6)(7,8,10,9),
+    Perm()(5,9,13,16)(6,10,14,17)(18,19,0,20)]
+
+# Symmetries of the sudoku board 4x4 (test_sudoku4.py).
+SUDOKU4 = [
+    Perm()(1,2)(5,6)(9,10)(13,14),
+    Perm()(3,4)(7,8)(11,12)(15,0),
+    Perm()(1,3)(2,4)(5,7)(6,8)(9,11)(10,12)(13,15)(14,0),
+    Perm()(1,5)(2,6)(3,7)(4,8),
+    Perm()(9,13)(10,14)(11,15)(12,0),
+    Perm()(1,9)(2,10)(3,11)(4,12)(5,13)(6,14)(7,15)(8,0),
+    Perm()(1,4,0,13)(2,8,15,9)(3,12,14,5)(6,7,11,10)]
+
+SYM6 = [Perm()(0, 1), Perm()(*range(6))]
+ALT6 = [Perm()(0, 1, 2), Perm()(1, 2, 3), Perm()(2, 3, 4), Perm()(3, 4, 5)]
+SYM7 = [Perm()(0, 1), Perm()(*range(7))]
+
+CASES = [("sudoku 4x4", SUDOKU4), ("Sym(6)", SYM6), ("Alt(6)", ALT6),
+    ("Sym(7)", SYM7), ("Rubik 2x2 <R, D>", RUBIK2)]
+
+OLD_MAX_ORDER = 1000   # stary algorytm jest kwadratowy
+
+
+def old_insert(group, perm):
+    """The closure by all products (the previous groups.Group.insert)."""
+    if perm in group:
+        return
+    old_order = group.order()
+    key1 = perm.key()
+    group[key1] = perm
+    perms_added = dict()
+    perms_added[key1] = perm
+    perms_generated = dict()
+    new_order = group.order()
+    while new_order > old_order:
+        old_order = new_order
+        for key1 in perms_added:
+            for perm2 in group.iterperms():
+                perm3 = perms_added[key1] * perm2
+                key3 = perm3.key()
+                if not dict.__contains__(group, key3):
+                    perms_generated[key3] = perm3
+        group.update(perms_generated)
+        perms_added = perms_generated
+        perms_generated = dict()
+        new_order = group.order()
+
+
+def bench_insert(cases=CASES):
+    """Insert generators into groups, time [s]."""
+    print("inserting generators, time [s]")
+    print("{:>18} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        "group", "order", "old", "groups", "sets", "batch", "sets batch"))
+    for name, generators in cases:
+        times = []
+        G = groups.Group()
+        for perm in generators:
+            G.insert(perm)
+        order = G.order()
+        if order <= OLD_MAX_ORDER:
+            G = groups.Group()
+            t1 = time.time()
+            for perm in generators:
+                old_insert(G, perm)
+            times.append(time.time() - t1)
+            assert G.order() == order
+        else:
+            times.append(float("nan"))
+        for module in (groups, setsgroups):
+            H = module.Group()
+            t1 = time.time()
+            for perm in generators:
+                H.insert(perm)
+            times.append(time.time() - t1)
+            assert H.order() == order
+        for module in (groups, setsgroups):
+            if np is None:
+                times.append(float("nan"))
+                continue
+            H = module.Group()
+            t1 = time.time()
+            for perm in generators:
+                H.insert(perm, batch=True)
+            times.append(time.time() - t1)
+            assert H.order() == order
+        print("{:>18} {:>8} ".format(name, order)
+            + " ".join("{:>10.3f}".format(t) for t in times))
+
+
+def old_is_normal(group1, group2):
+    """H.is_normal(G) over all pairs (the previous version)."""
+    return all(perm2.conjugate(perm1) in group1
+        for perm1 in group1.iterperms() for perm2 in group2.iterperms())
+
+
+def old_is_abelian(group):
+    """G.is_abelian() over all pairs (the previous version)."""
+    return all(perm1.commutes_with(perm2)
+        for perm1 in group.iterperms() for perm2 in group.iterperms())
+
+
+def bench_structure(n=6):
+    """Structural tests on generators and on all elements, time [s]."""
+    G = groups.Group()
+    for perm in (Perm()(0, 1), Perm()(*range(n))):
+        G.insert(perm)
+    A = groups.Group()
+    for i in range(n - 2):
+        A.insert(Perm()(i, i + 1, i + 2))
+    C = groups.Group()
+    C.insert(Perm()(*range(n)))
+    print("structural tests for Sym({0}), Alt({0}), C_{0}, time [s]".format(n))
+    print("{:>24} {:>10} {:>10}".format("method", "old", "generators"))
+    cases = [
+        ("Alt.is_normal(Sym)", lambda: old_is_normal(A, G), lambda: A.is_normal(G)),
+        ("C.is_normal(Sym)", lambda: old_is_normal(C, G), lambda: C.is_normal(G)),
+        ("C.is_abelian()", lambda: old_is_abelian(C), C.is_abelian),
+        ("Alt.is_abelian()", lambda: old_is_abelian(A), A.is_abelian)]
+    for name, old_func, func in cases:
+        t1 = time.time()
+        result = old_func()
+        t2 = time.time()
+        assert func() == result
+        print("{:>24} {:>10.3f} {:>10.4f}".format(name, t2 - t1, time.time() - t2))
+
+
+def old_iterperms(group):
+    """simsgroups.Group.iterperms with the full product for each perm."""
+    for reps in itertools.product(*[list(level.values())
+            for level in reversed(group.Sigma)]):
+        perm = group.perm_class()
+        for rep in reps:
+            perm = rep * perm
+        yield perm
+
+
+def bench_iterperms(cases=CASES):
+    """Enumerate simsgroups groups, time [s]."""
+    print("simsgroups.Group.iterperms(), time [s]")
+    print("{:>18} {:>8} {:>8} {:>10} {:>10}".format(
+        "group", "order", "degree", "old", "new"))
+    for name, generators in cases:
+        G = simsgroups.Group()
+        for perm in generators:
+            G.insert(perm)
+        times = []
+        t1 = time.time()
+        old = list(old_iterperms(G))
+        times.append(time.time() - t1)
+        t1 = time.time()
+        new = list(G.iterperms())
+        times.append(time.time() - t1)
+        assert len(new) == G.order() and set(old) == set(new)
+        print("{:>18} {:>8} {:>8} ".format(name, G.order(), G.size)
+            + " ".join("{:>10.3f}".format(t) for t in times))
+
+
+def bench_contains(count=2000):
+    """Membership tests in the Rubik 3x3 group (simsgroups), time [s]."""
+    G = simsgroups.Group()
+    t1 = time.time()
+    for perm in RUBIK3:
+        G.insert(perm)
+    print("Rubik 3x3 group, order {}, insert {:.3f} s".format(
+        G.order(), time.time() - t1))
+    rng = random.Random(1)
+    perms = list()
+    for _ in range(count):   # losowe slowa dlugosci 30
+        perm = Perm()
+        for _ in range(30):
+            perm = perm * rng.choice(RUBIK3)
+        perms.append(perm)
+    twist = Perm()(1, 3)   # poza grupa
+    t1 = time.time()
+    assert all(perm in G for perm in perms)
+    t2 = time.time()
+    assert not any(perm * twist in G for perm in perms)
+    print("{} perms in G {:.3f} s, {} perms not in G {:.3f} s".format(
+        count, t2 - t1, count, time.time() - t2))
+
+
+def bench_random():
+    """Deterministic and randomized Schreier-Sims (simsgroups), time [s]."""
+    print("simsgroups: insert(), insert_many(), insert_random(), "
+        "insert_random(verify=True)")
+    print("{:>12} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+        "group", "degree", "insert", "many", "random", "verified"))
+    faces = list()
+    for perm in RUBIK3:
+        faces.extend([perm, perm * perm, perm * perm * perm])
+    cases = [("Rubik 3x3", RUBIK3), ("Rubik 18", faces)]
+    for n in (50, 100, 200):
+        cases.append(("Sym({})".format(n), [Perm()(0, 1), Perm()(*range(n))]))
+    for name, generators in cases:
+        times = []
+        orders = []
+        degree = max(perm.max() for perm in generators) + 1
+        for method in ("insert", "many", "random", "verified"):
+            if (method in ("insert", "many") and degree > 100
+                    or method == "verified" and degree > 50):   # za wolno
+                times.append(float("nan"))
+                continue
+            G = simsgroups.Group()
+            t1 = time.time()
+            if method == "insert":
+                for perm in generators:
+                    G.insert(perm)
+            elif method == "many":
+                G.insert_many(generators)
+            else:
+                G.insert_random(generators, verify=(method == "verified"), seed=1)
+            times.append(time.time() - t1)
+            orders.append(G.order())
+        assert len(set(orders)) == 1
+        print("{:>12} {:>8} ".format(name, degree)
+            + " ".join("{:>10.3f}".format(t) for t in times))
+
+
+def bench_save():
+    """Build, save and load the Rubik 3x3 table (simsgroups), time [s]."""
+    t1 = time.time()
+    G = simsgroups.Group()
+    for perm in RUBIK3:
+        G.insert(perm)
+    t2 = time.time()
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    G.save(path)
+    t3 = time.time()
+    H = simsgroups.Group.load(path)
+    t4 = time.time()
+    F = simsgroups.FrozenGroup.load(path)
+    t5 = time.time()
+    assert H.order() == F.order() == G.order()
+    print("Rubik 3x3 table, {} bytes: insert {:.3f} s, save {:.3f} s, "
+        "load {:.3f} s, mmap {:.4f} s".format(os.path.getsize(path),
+        t2 - t1, t3 - t2, t4 - t3, t5 - t4))
+    F.close()
+    os.remove(path)
+
+
+def bench_sampling(count=100000):
+    """Random elements of the Rubik 3x3 group, time [s]."""
+    G = simsgroups.Group()
+    G.insert_random(RUBIK3, seed=1)
+    rng = random.Random(1)
+    print("{} random elements of the Rubik 3x3 group, time [s]".format(count))
+    t1 = time.time()
+    for perm in G.random_elements(count, rng):
+        pass
+    print("{:>28} {:>10.3f}".format("simsgroups", time.time() - t1))
+    if np is not None:
+        t1 = time.time()
+        G.random_batch(count, seed=1)
+        print("{:>28} {:>10.3f}".format("simsgroups (batch)", time.time() - t1))
+    sampler = ProductReplacement(RUBIK3, rng=rng)
+    t1 = time.time()
+    for _ in range(count):
+        next(sampler)
+    print("{:>28} {:>10.3f}".format("product replacement", time.time() - t1))
+
+
+if __name__ == "__main__":
+
+    bench_insert()
+    bench_structure()
+    bench_iterperms()
+    bench_contains()
+    bench_random()
+    bench_save()
+    bench_sampling()
+
+# EOF
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+#
+# Benchmarks for perms. Usage: python3 -m permgroups.bench_perms
+
+import sys
+import time
+import tracemalloc
+from permgroups.perms import Perm, lex_rank, lex_unrank
+from permgroups.perms import lehmer_code, lehmer_decode
+from permgroups.batchperms import PermBatch, np
+from permgroups.groups import Group
+
+# Rubik 3x3, the numbering of facelets from test_rubik3.py.
+RUBIK3_SIZE = 48
+RUBIK3 = [
+    Perm()(1,3,8,6)(2,5,7,4)(9,33,25,17)(10,34,26,18)(11,35,27,19),
+    Perm()(33,35,40,38)(34,37,39,36)(1,9,41,32)(4,12,44,29)(6,14,46,27),
+    Perm()(9,11,16,14)(10,13,15,12)(6,17,43,40)(7,20,42,37)(8,22,41,35),
+    Perm()(17,19,24,22)(18,21,23,20)(8,25,0,16)(5,28,45,13)(3,30,43,11),
+    Perm()(25,27,32,30)(26,29,31,28)(3,33,46,24)(2,36,47,21)(1,38,0,19),
+    Perm()(41,43,0,46)(42,45,47,44)(14,22,30,38)(15,23,31,39)(16,24,32,40)]
+
+
+def bench_sparse():
+    """Memory of the Rubik generators after reads of fixed points."""
+    print("sparse perms (Rubik 3x3 generators)")
+    print("{:>10} {:>10} {:>10} {:>10}".format(
+        "keys", "bytes", "dense keys", "dense bytes"))
+    total = [0, 0]
+    for perm in RUBIK3:
+        # Odczyty punktow stalych, jak w label(), list(), cycles().
+        perm.label(RUBIK3_SIZE)
+        perm.list(RUBIK3_SIZE)
+        perm.cycles()
+        product = perm * RUBIK3[0] * ~perm
+        # Tyle zajmowala perm, gdy __missing__ dopisywal klucze.
+        dense = dict((key, perm[key]) for key in range(RUBIK3_SIZE))
+        print("{:>10} {:>10} {:>10} {:>10}".format(len(perm),
+            sys.getsizeof(perm), len(dense), sys.getsizeof(dense)))
+        total[0] += sys.getsizeof(perm) + sys.getsizeof(product)
+        total[1] += 2 * sys.getsizeof(dense)
+    print("total bytes (with products): {} sparse, {} dense".format(*total))
+
+
+def old_rank_lex(alist):
+    """The quadratic lexicographic ranking (the previous version)."""
+    size = len(alist)
+    lehmer = [0] * size
+    for i in range(size):
+        lehmer[i] = sum(1 for j in range(i + 1, size) if alist[i] > alist[j])
+    result = 0
+    for i, item in enumerate(lehmer):
+        result = result * (size - i) + item
+    return result
+
+
+def old_unrank_lex(size, rank):
+    """The lexicographic unranking with list.pop() (the previous version)."""
+    alist = [0] * size
+    for i in range(2, size + 1):
+        alist[size - i] = rank % i
+        rank = rank // i
+    E = list(range(size))
+    return [E.pop(item) for item in alist]
+
+
+def bench_rank(count=10000):
+    """Lexicographic ranking and unranking of random perms (lists)."""
+    print("lexicographic ranking of {} perms (1000 for size > 100), time [s]".format(count))
+    print("{:>6} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format("size",
+        "old rank", "rank", "batch", "old unrank", "unrank", "batch"))
+    for size in (12, 20, 64, 256):
+        if size > 100:   # mniej dlugich perms
+            count = 1000
+        lists = [Perm.random(size).list(size) for _ in range(count)]
+        times = []
+        t1 = time.time()
+        ranks = [old_rank_lex(alist) for alist in lists]
+        times.append(time.time() - t1)
+        t1 = time.time()
+        assert ranks == [lex_rank(alist) for alist in lists]
+        times.append(time.time() - t1)
+        if np is not None:
+            batch = PermBatch(lists)
+            t1 = time.time()
+            assert batch.rank_lex().tolist() == ranks
+            times.append(time.time() - t1)
+        else:
+            times.append(float("nan"))
+        t1 = time.time()
+        assert [old_unrank_lex(size, rank) for rank in ranks] == lists
+        times.append(time.time() - t1)
+        t1 = time.time()
+        assert [lex_unrank(size, rank) for rank in ranks] == lists
+        times.append(time.time() - t1)
+        if np is not None:
+            t1 = time.time()
+            assert PermBatch.unrank_lex(size, ranks).data.tolist() == lists
+            times.append(time.time() - t1)
+        else:
+            times.append(float("nan"))
+        print("{:>6} ".format(size) + " ".join("{:>10.3f}".format(t) for t in times))
+    print("unranking with the Fenwick tree and with list.pop(), time [s]")
+    for size in (1 << 12, 1 << 14, 1 << 16, 1 << 17):
+        lehmer = lehmer_code(Perm.random(size).list(size))
+        t1 = time.time()
+        alist = lehmer_decode(lehmer)
+        t2 = time.time()
+        E = list(range(size))
+        assert [E.pop(item) for item in lehmer] == alist
+        print("{:>6} {:>10.3f} {:>10.3f}".format(size, t2 - t1, time.time() - t2))
+
+
+def bench_conjugate(n=6):
+    """Conjugates and commutators of all pairs from Sym(n) and Alt(n)."""
+    G = Group()
+    G.insert(Perm()(0, 1))
+    G.insert(Perm()(*range(n)))
+    H = G.subgroup_search(lambda perm: perm.is_even())
+    pairs = [(p, q) for p in G.iterperms() for q in H.iterperms()]
+    print("conjugates and commutators, Sym({0}) x Alt({0}), {1} pairs".format(
+        n, len(pairs)))
+    print("{:>20} {:>10} {:>10} {:>10}".format(
+        "method", "time [s]", "perms", "peak [kB]"))
+    methods = [
+        ("p * q * ~p", lambda p, q: p * q * ~p),
+        ("p.conjugate(q)", lambda p, q: p.conjugate(q)),
+        ("p * q * ~p * ~q", lambda p, q: p * q * ~p * ~q),
+        ("p.commutator(q)", lambda p, q: p.commutator(q)),
+        ("p * q == q * p", lambda p, q: p * q == q * p),
+        ("p.commutes_with(q)", lambda p, q: p.commutes_with(q))]
+    init = Perm.__init__
+    counter = [0]
+    def counting_init(self, data=None):
+        counter[0] += 1
+        init(self, data)
+    for name, func in methods:
+        t1 = time.time()
+        for p, q in pairs:
+            func(p, q)
+        t2 = time.time() - t1
+        # Liczymy nowe perms (takze posrednie) i szczyt pamieci.
+        counter[0] = 0
+        Perm.__init__ = counting_init
+        tracemalloc.start()
+        for p, q in pairs:
+            func(p, q)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        Perm.__init__ = init
+        print("{:>20} {:>10.3f} {:>10} {:>10.1f}".format(
+            name, t2, counter[0], peak / 1024.0))
+
+if __name__ == "__main__":
+
+    bench_sparse()
+    bench_rank()
+    bench_conjugate()
+
+# EOF
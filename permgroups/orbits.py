@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+#
+# Orbits from generators (Schreier vectors), used by all groups.
+
+def schreier_vector(generators, point):
+    """Return the orbit (a list) and the Schreier vector (a dict) of the point.
+    vector[pt] is the index of the generator moving pt towards the point
+    (-1 for the point), so the group is not enumerated, O(|orbit| * #gens).
+    """
+    # Przeszukiwanie wszerz po odwrotnosciach generatorow.
+    inverses = [~gen for gen in generators]
+    orbit = [point]
+    vector = {point: -1}
+    for pt1 in orbit:   # lista orbit rosnie w czasie petli
+        for i, perm in enumerate(inverses):
+            pt2 = perm[pt1]
+            if pt2 not in vector:
+                vector[pt2] = i
+                orbit.append(pt2)
+    return orbit, vector
+
+
+def trace(generators, vector, pt, perm):
+    """Return the product t * perm, where t is the product of generators
+    moving pt to the root of the vector (~t moves the root to pt).
+    """
+    i = vector[pt]
+    while i >= 0:
+        gen = generators[i]
+        perm = gen * perm
+        pt = gen[pt]
+        i = vector[pt]
+    return perm
+
+
+def orbit_list(generators, points):
+    """Return a list of orbits of the group generated by generators."""
+    used = set()
+    result = list()
+    for pt1 in points:
+        if pt1 in used:
+            continue
+        orbit = schreier_vector(generators, pt1)[0]   # we start a new orbit
+        used.update(orbit)
+        result.append(orbit)
+    return result
+
+
+def action_generators(generators, points, perm_class):
+    """Return the generators of the induced action on points."""
+    adict = dict()   # for numbering of points
+    for i, pt in enumerate(points):
+        adict[pt] = i
+    return [perm_class(data=[adict[gen[pt]] for pt in points])
+        for gen in generators]
+
+# EOF
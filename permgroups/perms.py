@@ -7,8 +7,13 @@ except NameError:   # Python 3
     integer_types = (int,)
 
 import random
+from array import array
 from functools import reduce
 
+LETTERS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_"
+
+FENWICK_SIZE = 1 << 16   # lex_unrank() uses a Fenwick tree from this size
+
 
 def gcd(a, b): 
     """Compute the greatest common divisor."""
@@ -24,21 +29,140 @@ def swap(L, i, j):
     """Exchange of two elements on the list."""
     L[i], L[j] = L[j], L[i]
 
+def images_key(alist):
+    """Return the bytes key for the list of images.
+    Images are stored as uint8 (uint16, uint32 for longer lists).
+    """
+    size = len(alist)
+    if size <= 1 << 8:
+        return bytes(alist)
+    elif size <= 1 << 16:
+        return array("H", alist).tobytes()
+    return array("I", alist).tobytes()
+
+def lehmer_code(alist):
+    """Return the inversion vector of the list (0, 1, ..., n-1 permuted).
+    A binary indexed tree (Fenwick tree) is used, O(n log n).
+    """
+    size = len(alist)
+    tree = [0] * (size + 1)   # liczniki wartosci juz widzianych
+    lehmer = [0] * size
+    for i in range(size - 1, -1, -1):
+        # Liczymy mniejsze wartosci na prawo od pozycji i.
+        counter = 0
+        j = alist[i]
+        while j > 0:
+            counter += tree[j]
+            j -= j & -j
+        lehmer[i] = counter
+        j = alist[i] + 1
+        while j <= size:
+            tree[j] += 1
+            j += j & -j
+    return lehmer
+
+def lehmer_decode(lehmer):
+    """Return the list with the given inversion vector.
+    A binary indexed tree (Fenwick tree) is used, O(n log n).
+    """
+    size = len(lehmer)
+    tree = [i & -i for i in range(size + 1)]   # wszystkie wartosci wolne
+    step = 1
+    while 2 * step <= size:
+        step *= 2
+    alist = [0] * size
+    for i, item in enumerate(lehmer):
+        # Szukamy wolnej wartosci o numerze item (od zera).
+        pos = 0
+        k = step
+        while k:
+            if pos + k <= size and tree[pos + k] <= item:
+                pos += k
+                item -= tree[pos]
+            k //= 2
+        alist[i] = pos
+        j = pos + 1
+        while j <= size:
+            tree[j] -= 1
+            j += j & -j
+    return alist
+
+def lex_rank(alist):
+    """Return the lexicographic rank of the list."""
+    size = len(alist)
+    result = 0
+    for i, item in enumerate(lehmer_code(alist)):   # zmodyfikowany horner
+        result = result * (size - i) + item
+    return result
+
+def lex_unrank(size, rank):
+    """Return the list with the given lexicographic rank."""
+    lehmer = [0] * size   # zapis w systemie silniowym
+    for i in range(2, size + 1):
+        rank, lehmer[size - i] = divmod(rank, i)
+    if rank > 0:
+        raise ValueError("size is too small")
+    if size >= FENWICK_SIZE:
+        return lehmer_decode(lehmer)
+    # Dla malych list pop() (memmove w C) jest szybsze od drzewa.
+    E = list(range(size))
+    return [E.pop(item) for item in lehmer]
+
+def mr_rank(alist):
+    """Return the Myrvold and Ruskey rank of the list, O(n)."""
+    size = len(alist)
+    alist = list(alist)   # alist i blist sa zmieniane
+    blist = [0] * size
+    for key, value in enumerate(alist):
+        blist[value] = key
+    result = 0
+    factor = 1
+    for n in range(size, 1, -1):   # zamiast rekurencji
+        s = alist[n - 1]
+        swap(alist, n - 1, blist[n - 1])
+        swap(blist, s, n - 1)
+        result += s * factor
+        factor *= n
+    return result
+
+def mr_unrank(size, rank):
+    """Return the list with the given Myrvold and Ruskey rank, O(n)."""
+    alist = list(range(size))
+    while size > 0:
+        rank, item = divmod(rank, size)
+        swap(alist, size - 1, item)
+        size = size - 1
+    return alist
+
 
 class Perm(dict):
     """The class defining a perm."""
 
+    # The cached hash, cycles and cycle type (None if unknown).
+    __slots__ = ("_hash", "_cycles", "_cycle_type")
+
     def __init__(self, data=None):
         """Load up a Perm instance."""
+        self._hash = None
+        self._cycles = None
+        self._cycle_type = None
         if data:
-            for key, value in enumerate(data):
-                self[key] = value
+            # Nowa perm, punkty ruszane zapisujemy wprost (bez __setitem__).
+            dict.update(self, {key: value
+                for key, value in enumerate(data) if key != value})
+
+    @classmethod
+    def _from_dict(cls, images):
+        """Return a new perm from the dict of moved points."""
+        perm = cls()
+        dict.update(perm, images)
+        return perm
 
     def __repr__(self):
         """Compute the string representation of the perm."""
         words = ["Perm()"]
-        for cycle in self.cycles():
-            words.append(str(tuple(cycle)))
+        for cycle in self._get_cycles():
+            words.append(str(cycle))
         return "".join(words)
 
     def __nonzero__(self):   # Py2
@@ -48,33 +172,38 @@ class Perm(dict):
     __bool__ = __nonzero__   # Py3
 
     def __missing__(self, key):
-        """Enter the key into the dict and return the key."""
-        self[key] = key
+        """Return the key (a fixed point is not stored)."""
         return key
 
     def __mul__(self, other):
         """Return the product of the perms."""
-        perm = Perm()
-        # Ustalam potrzebne klucze.
-        # Najpierw other, bo self dostanie nowe klucze.
-        for key in other:
-            perm[key] = self[other[key]]
-        # Tutaj other urosnie, ale chyba to nie szkodzi.
-        for key in self:
-            perm[key] = self[other[key]]
-        return perm
+        if not isinstance(other, Perm):
+            return NotImplemented
+        images = dict()
+        # Zapamietujemy tylko punkty ruszane.
+        for key, value in other.items():
+            value = self.get(value, value)
+            if value != key:
+                images[key] = value
+        for key, value in self.items():
+            if key not in other and value != key:
+                images[key] = value
+        return Perm._from_dict(images)
 
     def label(self, size=None):
         """Return the string label for the perm."""
         if size is None:
             size = self.max() + 1
-        #letters = "0123456789abcdefghijklmnopqrstuvwxyz"
-        letters = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_"
         chars = list()
         for key in range(size):
-            chars.append(letters[self[key]])
+            chars.append(LETTERS[self[key]])
         return "".join(chars)
 
+    def key(self):
+        """Return the bytes key for the perm (no limit for the size)."""
+        size = max(self) + 1 if len(self) else 1
+        return images_key([self.get(key, key) for key in range(size)])
+
     def max(self):
         """Return the highest element moved by the perm."""
         # Tutaj chyba dwa razy przebiegamy self.
@@ -100,10 +229,11 @@ class Perm(dict):
 
     def __invert__(self):   # ~perm
         """Find the inverse of the perm."""
-        perm = Perm()
-        for key in self:
-            perm[self[key]] = key
-        return perm
+        images = dict()
+        for key, value in self.items():
+            if key != value:
+                images[value] = key
+        return Perm._from_dict(images)
 
     def __call__(self, *args):          # perm(a, b, ...)
         """Return the product of the perm and the cycle."""
@@ -113,48 +243,87 @@ class Perm(dict):
         # Musze wykorzystac tymczasowy slownik.
         for i in range(n):
             changed[args[i]] = self[args[(i + 1) % n]]
-        self.update(changed)
+        for key, value in changed.items():
+            self[key] = value   # __setitem__ usuwa punkty stale
         return self
 
     # __getitem__ dziedziczone z dict
 
+    def _reset(self):
+        """Forget the cached hash, cycles and cycle type."""
+        self._hash = None
+        self._cycles = None
+        self._cycle_type = None
+
+    def __setitem__(self, key, value):
+        """Set perm[key] = value (a fixed point is not stored)."""
+        if key != value:
+            dict.__setitem__(self, key, value)
+        elif key in self:   # punkt staly usuwamy
+            dict.__delitem__(self, key)
+        self._reset()
+
+    def __delitem__(self, key):
+        """Delete perm[key], key becomes a fixed point."""
+        dict.__delitem__(self, key)
+        self._reset()
+
+    def update(self, *args, **kwargs):
+        """Update the perm from a dict (fixed points are not stored)."""
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        """Return perm[key], set perm[key] = default if key is fixed."""
+        if key not in self and default is not None:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        """Remove the key and return its image."""
+        value = dict.pop(self, key, *default)
+        self._reset()
+        return value
+
+    def popitem(self):
+        """Remove and return some (key, image) pair."""
+        item = dict.popitem(self)
+        self._reset()
+        return item
+
+    def clear(self):
+        """Make the perm the identity."""
+        dict.clear(self)
+        self._reset()
+
     def order(self):
         """Return the order of the perm."""
-        alist = [len(cycle) for cycle in self.cycles()]
-        return reduce(lcm, alist, 1)
+        return reduce(lcm, self.cycle_type(), 1)
 
     def __eq__(self, other):
         """Test if the perms are equal."""
-        return (self * ~other).is_identity()
+        if not isinstance(other, Perm):
+            return NotImplemented
+        # Perms przechowuja tylko punkty ruszane.
+        return dict.__eq__(self, other)
 
     def __ne__(self, other):
         """Test if the perms are not equal."""
-        return not self == other
+        if not isinstance(other, Perm):
+            return NotImplemented
+        return dict.__ne__(self, other)
 
     def __pow__(self, n):
         """Find powers of the perm."""
-        if n == 0:
-            return Perm()
-        if n < 0:
-            return pow(~self, -n)
-        perm = self
-        if n == 1:
-            return self
-        elif n == 2:
-            return self * self
-        else:   # binary exponentiation
-            result = Perm()  # identity
-            while True:
-                if n % 2 == 1:
-                    result = result * perm
-                    n = n - 1  # przez ile pomnozyc
-                    if n == 0:
-                        break
-                if n % 2 == 0:
-                    perm = perm * perm
-                    n = n // 2  # zmienilo sie perm!
-                    #print "n =", n
-        return result
+        # Kazdy cykl przesuwamy o n % len(cycle), O(size).
+        images = dict()
+        for cycle in self._get_cycles():
+            length = len(cycle)
+            shift = n % length
+            if shift:
+                for i, key in enumerate(cycle):
+                    images[key] = cycle[(i + shift) % length]
+        return Perm._from_dict(images)
 
     def list(self, size=None):
         """Return the perm in array form."""
@@ -165,39 +334,42 @@ class Perm(dict):
             raise ValueError("size is too small")
         return [self[key] for key in range(size)]
 
+    def _get_cycles(self):
+        """Return a tuple of cycles (tuples) computed once for the perm."""
+        if self._cycles is None:
+            checked = set()
+            cyclic_form = list()
+            # Cykle zaczynaja sie od najmniejszego elementu.
+            for i in sorted(self):
+                if i in checked or self[i] == i:
+                    continue
+                cycle = [i]
+                checked.add(i)
+                j = self[i]
+                while j != i:
+                    cycle.append(j)
+                    checked.add(j)
+                    j = self[j]
+                cyclic_form.append(tuple(cycle))
+            self._cycles = tuple(cyclic_form)
+        return self._cycles
+
     def cycles(self):
         """Return a list of cycles for the perm."""
-        size = self.max() + 1
-        unchecked = [True] * size
-        cyclic_form = list()
-        for i in range(size):
-            if unchecked[i]:
-                cycle = list()
-                cycle.append(i)
-                unchecked[i] = False
-                j = i
-                while unchecked[self[j]]:
-                    j = self[j]
-                    cycle.append(j)
-                    unchecked[j] = False
-                if len(cycle) > 1:
-                    cyclic_form.append(cycle)
-        return cyclic_form
+        return [list(cycle) for cycle in self._get_cycles()]
+
+    def cycle_type(self):
+        """Return the lengths of cycles (without 1), in decreasing order."""
+        if self._cycle_type is None:
+            self._cycle_type = tuple(sorted(
+                (len(cycle) for cycle in self._get_cycles()), reverse=True))
+        return self._cycle_type
 
     def parity(self):
         """Return the parity of the perm (0 or 1)."""
-        size = self.max() + 1
-        unchecked = [True] * size
-        c = 0    # liczba cykli w perm, lacznie z jednoelementowymi
-        for j in range(size):
-            if unchecked[j]:
-                c = c + 1
-                unchecked[j] = False
-                i = j
-                while self[i] != j:
-                    i = self[i]
-                    unchecked[i] = False
-        return (size - c) % 2
+        # Cykl dlugosci k to k-1 transpozycji.
+        cycle_type = self.cycle_type()
+        return (sum(cycle_type) - len(cycle_type)) % 2
 
     def is_even(self):
         """Test if the perm is even."""
@@ -217,97 +389,102 @@ class Perm(dict):
 
     def commutes_with(self, other):
         """Test if the perms commute."""
-        # Chyba troche silowe rozwiazanie. Czy jest wolniejsze?
-        return self * other == other * self
+        # Porownujemy self[other[x]] i other[self[x]] bez tworzenia iloczynow.
+        for key in self:
+            if self[other[key]] != other[self[key]]:
+                return False
+        for key in other:
+            if key not in self and self[other[key]] != other[key]:
+                return False
+        return True
+
+    def conjugate(self, other):
+        """Return the conjugate self * other * ~self in a single pass."""
+        # (p*q*~p)[p[x]] = p[q[x]], tylko dla punktow ruszanych przez q.
+        images = dict()
+        for key, value in other.items():
+            if key != value:
+                images[self[key]] = self[value]
+        return Perm._from_dict(images)
 
     def commutator(self, other):
-        """Find the commutator of the perms."""
-        return self * other * ~self * ~other
+        """Find the commutator self * other * ~self * ~other."""
+        # [p,q][q[p[x]]] = p[q[x]], bez odwrotnosci i iloczynow posrednich.
+        images = dict()
+        for key in self:
+            value = self[other[key]]
+            key = other[self[key]]
+            if key != value:
+                images[key] = value
+        for key in other:
+            if key not in self:
+                value = self[other[key]]
+                key = other[key]
+                if key != value:
+                    images[key] = value
+        return Perm._from_dict(images)
 
     @classmethod
-    def random(cls, size):
-        """Return a random perm of the given size."""
+    def random(cls, size, rng=None):
+        """Return a random perm of the given size.
+        rng is a random.Random instance (the random module by default).
+        """
         # Usage: Perm.random(size)
         new_data = list(range(size))
-        random.shuffle(new_data)
+        (random if rng is None else rng).shuffle(new_data)
         return cls(data=new_data)
 
+    @classmethod
+    def random_stream(cls, size, seed=None, count=None):
+        """The generator for random perms from an independent generator.
+        The same seed gives the same perms (use other seeds for other workers).
+        If count is None, the generator is infinite.
+        """
+        # Usage: for perm in Perm.random_stream(size, seed=worker): ...
+        rng = random.Random(seed)
+        new_data = list(range(size))
+        n = 0
+        while count is None or n < count:
+            # Tasowanie dowolnego ustawienia daje jednostajny rozklad.
+            rng.shuffle(new_data)
+            yield cls(data=new_data)
+            n = n + 1
+
+    @classmethod
+    def random_batch(cls, size, count, seed=None):
+        """Return a list of count random perms (see random_stream)."""
+        return list(cls.random_stream(size, seed, count))
+
     def inversion_vector(self, size):
         """Return the inversion vector of the perm."""
-        lehmer = [0] * size
-        for i in range(size):
-            counter = 0
-            for j in range(i + 1, size):
-                if self[i] > self[j]:
-                    counter += 1
-            lehmer[i] = counter
-        return lehmer
+        return lehmer_code(self.list(size))
 
     def rank_lex(self, size):
         """Return the lexicographic rank of the perm."""
-        lehmer = self.inversion_vector(size) # zapis w systemie silniowym
-        lehmer.reverse()   # trzeba odwrocic kolejnosc
-        k = size - 1
-        result = lehmer[k]
-        while k > 0:   # zmodyfikowany horner
-            k = k - 1
-            result = result * (k + 1) + lehmer[k]
-        return result
+        return lex_rank(self.list(size))
 
     @classmethod
     def unrank_lex(cls, size, rank):
         """Lexicographic perm unranking."""
         # Usage: Perm.unrank_lex(size, rank)
-        #alist = [0]   # bedzie dlugosc size
-        # chyba wydajniej jest od razu zrobic dobra dlugosc
-        alist = [0] * size   # bedzie dlugosc size
-        i = 1
-        while i < size:
-            i = i + 1
-            #alist.append(rank%i)
-            alist[i - 1] = rank % i
-            rank = rank // i
-        if rank > 0:
-            raise ValueError("size is too small")
-        alist.reverse() # to jest inversion vector
-        E = list(range(size))
-        new_data = list()
-        # chyba pop(item) nie jest wydajne, bo jest przebudowa listy
-        for item in alist:
-            new_data.append(E.pop(item))
-        # tutaj E jest juz puste
-        assert len(E) == 0
-        return cls(data=new_data)
+        return cls(data=lex_unrank(size, rank))
 
     def rank_mr(self, size):
         """Myrvold and Ruskey rank of the perm."""
-        alist = self.list(size)
-        blist = (~self).list(size)
-        return Perm._mr_helper(size, alist, blist)
-
-    @classmethod
-    def _mr_helper(cls, size, alist, blist):
-        """A helper function for MR ranking."""
-        # both alist and blist are modified
-        if size == 1:
-            return 0
-        s = alist[size - 1]
-        swap(alist, size - 1, blist[size-1])
-        swap(blist, s, size - 1)
-        return s + size * cls._mr_helper(size - 1, alist, blist)
+        return mr_rank(self.list(size))
 
     @classmethod
     def unrank_mr(cls, size, rank):
         """Myrvold and Ruskey perm unranking."""
-        new_data = list(range(size))
-        while size > 0:
-            swap(new_data, size - 1, rank % size)
-            rank = rank // size
-            size = size - 1
-        return cls(data=new_data)
+        # Usage: Perm.unrank_mr(size, rank)
+        return cls(data=mr_unrank(size, rank))
 
     def __hash__(self):
         """Hashable perms."""
-        return hash(tuple(self.list()))
+        if self._hash is None:
+            # Jak hash(tuple(self.list())), ale bez max() i is_identity().
+            size = max(self) + 1 if len(self) else 1
+            self._hash = hash(tuple([self.get(key, key) for key in range(size)]))
+        return self._hash
 
 # EOF
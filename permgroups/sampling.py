@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+#
+# Random group elements from generators (product replacement).
+
+import random
+from permgroups.perms import Perm
+
+
+class ProductReplacement(object):
+    """The product replacement generator of random perms.
+    Only the generators are needed, the perms are nearly uniform
+    in the generated group after the initial scrambling.
+    """
+
+    def __init__(self, generators, perm_class=Perm, slots=10, scramble=50,
+            rng=None):
+        """Load up a ProductReplacement instance.
+        rng is random.Random (or the random module if None).
+        """
+        self.rng = random if rng is None else rng
+        gens = list(generators) or [perm_class()]
+        # Stan to co najmniej slots perms (generatory powtarzamy).
+        number = max(slots, len(gens), 2)
+        self.state = [gens[i % len(gens)] for i in range(number)]
+        self.accumulator = perm_class()
+        for _ in range(scramble):
+            self.next()
+
+    def __iter__(self):
+        """Return the iterator (the generator itself)."""
+        return self
+
+    def next(self):
+        """Return the next random perm."""
+        # Wariant "rattle": s_i = s_i * s_j^(+-1) lub s_j^(+-1) * s_i,
+        # akumulator a = a * s_i poprawia rozklad.
+        rng = self.rng
+        n = len(self.state)
+        i = rng.randrange(n)
+        j = rng.randrange(n - 1)
+        if j >= i:
+            j = j + 1
+        perm = self.state[j] if rng.random() < 0.5 else ~self.state[j]
+        if rng.random() < 0.5:
+            self.state[i] = self.state[i] * perm
+        else:
+            self.state[i] = perm * self.state[i]
+        self.accumulator = self.accumulator * self.state[i]
+        return self.accumulator
+
+    __next__ = next   # Python 3
+
+# EOF
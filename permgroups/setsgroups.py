@@ -1,14 +1,21 @@
 #!/usr/bin/env python3
 
+import random
 from permgroups.perms import Perm
+from permgroups.batchperms import PermBatch, np
+from permgroups.orbits import schreier_vector, orbit_list, action_generators
 
 
 class Group(set):
     """The class defining a perm group."""
 
-    def __init__(self):
+    def __init__(self, perm_class=Perm):
         """Load up a Group instance."""
-        self.add(Perm())
+        self.perm_class = perm_class   # Perm or arrayperms.Perm
+        self.generators = list()   # perms inserted, generating the group
+        self._sample = None   # lista perms do losowania
+        self._sample_batch = None
+        self.add(perm_class())
 
     # __str__ dziedziczone z set
 
@@ -16,27 +23,63 @@ class Group(set):
 
     # __contains__ dziedziczone z set
 
-    def insert(self, perm):
+    def insert(self, perm, batch=False):
         """The perm inserted into the group generates new 
-        perms in order to satisfy the group properties."""
+        perms in order to satisfy the group properties.
+        If batch is True, products are computed by PermBatch (numpy).
+        """
+        # Algorytm Dimino: grupa rosnie o cale warstwy H * rep,
+        # iloczyny z generatorami liczymy tylko dla reprezentantow.
         if perm in self:
             return
-        old_order = self.order()
-        self.add(perm)
-        perms_added = set([perm])
-        perms_generated = set()
-        new_order = self.order()
-        while new_order > old_order:
-            old_order = new_order
-            for perm1 in perms_added:
-                for perm2 in self:
-                    perm3 = perm1 * perm2
-                    if perm3 not in self:
-                        perms_generated.add(perm3)
-            self.update(perms_generated)
-            perms_added = perms_generated
-            perms_generated = set()
-            new_order = self.order()
+        self.generators.append(perm)
+        self._sample = None   # grupa sie zmienia
+        self._sample_batch = None
+        if batch:
+            self._insert_batch(perm)
+            return
+        old_perms = list(self)   # poprzednia grupa H
+        self._add_coset(old_perms, perm)
+        reps = [perm]
+        for rep in reps:   # lista reps rosnie w czasie petli
+            for gen in self.generators:
+                perm3 = rep * gen
+                if perm3 not in self:
+                    reps.append(perm3)
+                    self._add_coset(old_perms, perm3)
+
+    def _add_coset(self, old_perms, rep):
+        """Add the coset H * rep (H is a list of perms)."""
+        self.update(perm2 * rep for perm2 in old_perms)
+
+    def _insert_batch(self, perm):
+        """Add cosets H * rep with numpy, all new reps at once."""
+        # Warstwy H * rep dla calego frontu reprezentantow liczymy
+        # jednym iloczynem PermBatch.outer(), perms tworzymy tylko
+        # dla warstw nowych (reszta odpada po pierwszym elemencie).
+        size = max(gen.max() for gen in self.generators) + 1
+        old_perms = PermBatch.from_perms(list(self), size)
+        gens = PermBatch.from_perms(self.generators, size)
+        h = len(old_perms)
+        seen = set(old_perms.keys())   # klucze perms z grupy
+        reps = PermBatch.from_perms([perm], size)
+        while len(reps):
+            reps = self._add_cosets(old_perms.outer(reps), h, seen).outer(gens)
+
+    def _add_cosets(self, products, h, seen):
+        """Add new cosets from products (h rows for each coset),
+        return a batch with one perm from each new coset.
+        """
+        starts = list()
+        keys = products.keys()
+        for start in range(0, len(keys), h):
+            if keys[start] in seen:
+                continue   # warstwa juz jest w grupie
+            seen.update(keys[start:start + h])
+            self.update(self.perm_class(data=row)
+                for row in products.data[start:start + h].tolist())
+            starts.append(start)
+        return products[starts]
 
     def listperms(self):
         """Return the list of perms."""
@@ -46,26 +89,51 @@ class Group(set):
         """The generator for perms from the group."""
         return iter(self)
 
+    def _sample_list(self):
+        """Return the list of perms for sampling (cached until insert)."""
+        if self._sample is None:
+            # Porzadek zbioru zalezy od haszy, sortujemy dla powtarzalnosci.
+            self._sample = sorted(self, key=lambda perm: perm.key())
+        return self._sample
+
+    def random_element(self, rng=None):
+        """Return a random perm from the group (uniform)."""
+        rng = random if rng is None else rng
+        return rng.choice(self._sample_list())
+
+    def random_elements(self, count, rng=None):
+        """The generator for count random perms from the group (uniform).
+        rng is random.Random (or the random module if None).
+        """
+        rng = random if rng is None else rng
+        perms = self._sample_list()
+        for _ in range(count):
+            yield rng.choice(perms)
+
+    def random_batch(self, count, seed=None):
+        """Return a PermBatch of count random perms (requires numpy)."""
+        if self._sample_batch is None:
+            size = max([gen.max() for gen in self.generators] + [0]) + 1
+            self._sample_batch = PermBatch.from_perms(self._sample_list(), size)
+        batch = self._sample_batch
+        return batch[np.random.default_rng(seed).integers(len(batch), size=count)]
+
     def is_trivial(self):
         """Test if the group is trivial."""
         return len(self) == 1
 
     def orbits(self, points):
         """Return a list of orbits."""
-        used = set()
-        orbit_list = list()
-        for pt1 in points:
-            if pt1 in used:
-                continue
-            orbit = [pt1]     # we start a new orbit
-            used.add(pt1)
-            for perm in self:
-                pt2 = perm[pt1]
-                if pt2 not in used:
-                    orbit.append(pt2)
-                    used.add(pt2)
-            orbit_list.append(orbit)
-        return orbit_list
+        # Orbity z generatorow, kolejnosc punktow jak w wektorze Schreiera.
+        return orbit_list(self.generators, points)
+
+    def orbit(self, point):
+        """Return the orbit of the point."""
+        return schreier_vector(self.generators, point)[0]
+
+    def schreier_vector(self, point):
+        """Return the orbit and the Schreier vector of the point."""
+        return schreier_vector(self.generators, point)
 
     def is_transitive(self, points, strict=True):
         """Test if the group is transitive (has a single orbit).
@@ -74,7 +142,11 @@ class Group(set):
         """
         # Jest problem, bo nie ma self.size dla grupy.
         if strict:
-            return len(self.orbits(points)) == 1
+            points = list(points)
+            if not points:
+                return False
+            orbit = set(self.orbit(points[0]))
+            return all(pt in orbit for pt in points)
         else:   # ignorujemy nieruchome punkty
             number = sum(1 for orb in self.orbits(points) if len(orb) > 1)
             return number == 1
@@ -83,7 +155,7 @@ class Group(set):
         """Return a subgroup of all elements satisfying the property."""
         # Jezeli prop(perm) jest True, to perm zaliczamy do podgrupy.
         # Funkcja prop() nie moze byc byle jaka.
-        new_group = Group()
+        new_group = Group(self.perm_class)
         for perm in self:
             if prop(perm):
                 new_group.insert(perm)
@@ -98,8 +170,9 @@ class Group(set):
         """G.centralizer(H) - return the centralizer of H."""
         if other.is_trivial() or self.is_trivial():
             return self
+        # Wystarczy przemiennosc z generatorami H.
         return self.subgroup_search(lambda perm:
-            all(perm * perm2 == perm2 * perm for perm2 in other))
+            all(perm.commutes_with(perm2) for perm2 in other.generators))
 
     def center(self):
         """Return the center of the group."""
@@ -107,16 +180,15 @@ class Group(set):
 
     def normalizer(self, other):
         """G.normalizer(H) - return the normalizer of H."""
+        # Grupa skonczona, wystarcza generatory H.
         return self.subgroup_search(lambda perm:
-            all((perm * perm2 * ~perm in other) for perm2 in other))
+            all((perm.conjugate(perm2) in other) for perm2 in other.generators))
 
     def is_abelian(self):
         """Test if the group is abelian."""
-        for perm1 in self:
-            for perm2 in self:
-                # Trzeba umiec porownywac perms.
-                #if perm2 <= perm1:
-                    #continue
+        # Wystarczy sprawdzic pary generatorow.
+        for i, perm1 in enumerate(self.generators):
+            for perm2 in self.generators[i+1:]:
                 if not perm1.commutes_with(perm2):
                     return False
         return True
@@ -133,23 +205,28 @@ class Group(set):
         """H.is_normal(G) - test if H is a normal subgroup of G.
         For each h in H, g in G, g*h*~g belongs to H.
         """
-        for perm1 in self:
-            for perm2 in other:
-                if perm2 * perm1 * ~perm2 not in self:
+        # Wystarczy sprawdzic generatory H i generatory G.
+        for perm1 in self.generators:
+            for perm2 in other.generators:
+                if perm2.conjugate(perm1) not in self:
                     return False
         return True
 
     def normal_closure(self, other):
         """Return the normal closure (conjugate closure)."""
-        new_group = Group()
-        for perm1 in self:
-            for perm2 in other:
-                new_group.insert(perm1 * perm2 * ~perm1)
+        new_group = Group(self.perm_class)
+        for perm in other.generators:
+            new_group.insert(perm)
+        # Sprzezamy generatory H przez generatory G, az do skutku
+        # (lista new_group.generators rosnie w czasie petli).
+        for perm2 in new_group.generators:
+            for perm1 in self.generators:
+                new_group.insert(perm1.conjugate(perm2))
         return new_group
 
     def commutator(self, group1, group2):
         """Return the commutator of the groups."""
-        new_group = Group()
+        new_group = Group(self.perm_class)
         for perm1 in group1:
             for perm2 in group2:
                 new_group.insert(perm1.commutator(perm2))
@@ -164,13 +241,10 @@ class Group(set):
         # Sprawdzamy, czy grupa jest tranzytywna na punktach.
         if not self.is_transitive(points):
             raise TypeError("the group is not transitive on points")
-        adict = dict()
-        for i, pt in enumerate(points):
-            adict[pt] = i
-        new_group = Group()
-        for perm in self:
-            new_data = [adict[perm[pt]] for pt in points]
-            new_group.insert(Perm(data=new_data))
+        # Wystarcza generatory, grupy nie przegladamy.
+        new_group = Group(self.perm_class)
+        for perm in action_generators(self.generators, points, self.perm_class):
+            new_group.insert(perm)
         return new_group
 
 # EOF
@@ -6,129 +6,1272 @@ try:
 except NameError:   # Python 3
     integer_types = (int,)
 
-from permgroups.perms import Perm
+import sys
+import random
+import mmap
+from array import array
+from permgroups.perms import Perm, images_key
+from permgroups.batchperms import PermBatch, np, dtype_for
+from permgroups.orbits import schreier_vector, orbit_list, action_generators
+
+# Format pliku z tablica Sigma (liczby uint32 little-endian):
+# MAGIC, naglowek [VERSION, flags, size, m, r, t, g], dalej tablice
+# base (m), level_sizes (m), table (m * size), reps (r * size),
+# invs (r * size), T (t * size), generators (g * size).
+# table[i * size + j] to numer reprezentanta Sigma[i][j] lub NONE.
+MAGIC = b"PGSIMS\r\n"
+VERSION = 1
+TYPECODE = "I"   # uint32
+NONE = 0xFFFFFFFF
+HEADER = 7   # liczba slow naglowka
+MAX_WORD = 10**7   # najdluzsze slowo rozwijane przez factor()
+
+
+def _words(alist):
+    """Return an array of uint32 words (little-endian) from the list."""
+    result = array(TYPECODE, alist)
+    if sys.byteorder == "big":
+        result.byteswap()
+    return result
+
+
+def compose(alist, blist):
+    """Return the list of images of the product (lists of the same length)."""
+    return [alist[x] for x in blist]
+
+
+def iter_products(levels, identity):
+    """The generator for products rep_0 * rep_1 * ... (rep_k from levels[k],
+    None is the identity), partial products are computed once.
+    """
+    if not levels:
+        yield identity
+        return
+    last = len(levels) - 1
+    stack = [(0, identity)]
+    while stack:
+        k, perm = stack.pop()
+        if k == last:   # zawsze nowa perm dla uzytkownika
+            for rep in levels[k]:
+                yield (identity if rep is None else rep) * perm
+        else:
+            for rep in reversed(levels[k]):
+                stack.append((k + 1, perm if rep is None else rep * perm))
 
 
 class Group(set):
-    """The class defining a perm group."""
-
-    def __init__(self):
-        """Load up a Group instance."""
-        self.size = 1   # rozmiar permutacji w grupie
-        # Inicjalizacja struktur.
-        self.Sigma = [(k+1) * [None] for k in range(self.size)]
-        # Lista Sigma[k] zawiera co najmniej identycznosc.
-        for k in range(self.size):
-            self.Sigma[k][k] = Perm()   # identycznosc sigma_kk
+    """The class defining a perm group (a stabilizer chain).
+
+    base[i] is the i-th base point, Sigma[i] is a dict {j: perm}, where
+    perm fixes base[0], ..., base[i-1] and moves base[i] to j.
+    """
+
+    def __init__(self, perm_class=Perm, base=None, words=False):
+        """Load up a Group instance.
+        base is a list of points (the chain is extended when needed).
+        If words is True, perms in the table remember words in generators.
+        """
+        self.perm_class = perm_class   # Perm or arrayperms.Perm
+        self._auto_base = base is None
+        self.generators = list()   # perms inserted, generating the group
+        self.size = 0   # rozmiar permutacji w grupie
+        self.base = []
+        self.Sigma = []
+        # Odwrotnosci Sigma[i][j] jako listy obrazow (do przesiewania).
+        self.Sigma_inv = []
         # Silne generatory.
-        self.all_Sigma = [Perm()]   # E tez dodam raz
+        self.all_Sigma = [perm_class()]   # E tez dodam raz
         self.all_T = []
+        # Te same perms jako listy obrazow (dla algorytmow A i B).
+        self._Sigma_images = [list(range(self.size))]
+        self._T_images = []
+        # Liczniki dla algorytmow A i B.
+        self.sift_count = 0
+        self.product_count = 0
+        self._checked = set()   # przesiane generatory Schreiera
+        # Slowa jako program liniowy (SLP): linia to ("e",), ("g", n),
+        # ("*", a, b) lub ("~", a), slowo to numer linii (None - brak).
+        self._slp = [("e",)] if words else None
+        self._slp_len = [0]   # dlugosci slow po rozwinieciu
+        self._Sigma_words = []   # {j: (slowo, slowo odwrotnosci)}
+        self._Sigma_flat_words = [0]   # slowa dla _Sigma_images
+        self._T_words = []   # slowa dla _T_images
+        self._extend(1)
+        for point in (base or []):
+            self._add_level(point)
+
+    def _extend(self, size):
+        """Extend lists of images for perms of the given size."""
+        if size <= self.size:
+            return
+        tail = list(range(self.size, size))   # nowe punkty sa stale
+        for images in self._Sigma_images:
+            images.extend(tail)
+        for images in self._T_images:
+            images.extend(tail)
+        for level in self.Sigma_inv:
+            for images in level.values():
+                images.extend(tail)
+        self.size = size
+
+    def _add_level(self, point):
+        """Append the point to the base (a new level with the identity)."""
+        self._extend(point + 1)
+        self.base.append(point)
+        self.Sigma.append({point: self.perm_class()})
+        self.Sigma_inv.append({point: list(range(self.size))})
+        self._Sigma_words.append({point: (0, 0)})
 
     def __str__(self):
         """Return a string representation of the group."""
         t = len(self.all_T)
-        return "Group() with {} strong generators".format(t)
+        return "Group() with {} strong generators ({} sifts, {} products)".format(
+            t, self.sift_count, self.product_count)
 
     def order(self):
         """Return the group order."""
         result = 1
-        for k in range(self.size):
-            result *= sum(1 for perm in self.Sigma[k] if perm)
+        for level in self.Sigma:
+            result *= len(level)
         return result
 
+    def _level(self, images):
+        """Return the index of the first base point moved by the perm."""
+        for i, point in enumerate(self.base):
+            if images[point] != point:
+                return i
+        return len(self.base)
+
+    def _sift(self, perm, path=None):
+        """Sift the perm through the Sigma table.
+        Return (i, images), where images is the list form of the residue
+        and Sigma[i] has no images[base[i]] (i = -1 if the perm is
+        in the group, i = len(base) if the residue fixes the base).
+        """
+        return self._sift_images(perm.list(self.size), path)
+
+    def _sift_images(self, images, path=None):
+        """Sift the list of images (the list is not changed), see _sift().
+        The words of used perms are appended to the path (a list).
+        """
+        for i, (point, level) in enumerate(zip(self.base, self.Sigma_inv)):
+            j = images[point]
+            if j == point:   # Sigma[i][point] to identycznosc
+                continue
+            inv = level.get(j)
+            if inv is None:
+                return i, images
+            # Nowa lista jest szybsza niz zapis do starej (CPython).
+            images = [inv[x] for x in images]
+            if path is not None:
+                path.append(self._Sigma_words[i][j])
+        # Reszta moze ruszac tylko punkty spoza bazy.
+        if len(self.base) < self.size and images != list(range(self.size)):
+            return len(self.base), images
+        return -1, images
+
     def __contains__(self, perm):
         """ Test if the perm belongs to the group."""
-        size = perm.max() + 1
-        if size > self.size:   # trzeba powiekszyc baze
-            self.Sigma.extend( (k+1) * [None] for k in range(self.size, size) )
-            # Lista Sigma[k] zawiera co najmniej identycznosc.
-            for k in range(self.size, size):
-                self.Sigma[k][k] = Perm()   # identycznosc sigma_kk
-            self.size = size
-
-        k = self.size - 1         # start od samej gory
-        while k > 0:
-            j = perm[k]
-            if self.Sigma[k][j] is None:
-                return False
-            perm = ~self.Sigma[k][j] * perm
-            k = k - 1
-        return True
+        if perm.max() >= self.size:   # perm rusza punkt spoza grupy
+            return False
+        return self._sift(perm)[0] < 0
 
     def insert(self, perm):
         """The perm inserted into the group generates new 
         perms in order to satisfy the group properties."""
-        size = perm.max() + 1
-        if size > self.size:   # trzeba powiekszyc baze
-            self.Sigma.extend( (k+1) * [None] for k in range(self.size, size) )
-            # Lista Sigma[k] zawiera co najmniej identycznosc.
-            for k in range(self.size, size):
-                self.Sigma[k][k] = Perm()   # identycznosc sigma_kk
-            self.size = size
+        self._extend(perm.max() + 1)   # trzeba powiekszyc baze
+        if perm in self:
+            return
+        if self._auto_base:
+            self._fill_base([perm])
+        self.generators.append(perm)
+        self._run([("A", perm.list(self.size), self._generator_word())])
+        if self._auto_base:
+            self._drop_trivial_levels()
+
+    def insert_many(self, perms):
+        """Insert the perms at once (the deterministic Schreier-Sims).
+        The perms already in the group are dropped before the table grows.
+        """
+        perms = list(perms)
+        for perm in perms:
+            self._extend(perm.max() + 1)   # trzeba powiekszyc baze
+        if self._auto_base:
+            self._fill_base(perms)
+        seen = set()
+        for perm in perms:
+            # Przesiewamy przez czesc tablicy, reszty sie powtarzaja
+            # (np. U, U2, U3), po przesianiu sa generatorami silnymi.
+            path = list()
+            k, residue = self._sift(perm, path)
+            self.sift_count += 1
+            if k < 0 or images_key(residue) in seen:
+                continue
+            seen.add(images_key(residue))
+            self.generators.append(perm)
+            self._add_strong(residue, self._residue_word(path, self._generator_word()))
+        self._verify()
+        if self._auto_base:
+            self._drop_trivial_levels()
 
-        self.alg_A(perm.max(), perm)
+    def _fill_base(self, perms):
+        """Add the points moved by the perms to the base (a trivial
+        level before the first base point moved by the stabilizer).
+        """
+        # Algorytm Knutha jest szybki dla bazy n-1, n-2, ..., 0.
+        # Punkty stale dla wszystkich generatorow nie trafiaja do bazy.
+        moved = set()
+        for perm in perms:
+            moved.update(x for x in range(perm.max() + 1) if perm[x] != x)
+        for point in sorted(moved - set(self.base)):
+            # G^(i) rusza punkt, jesli rusza go silny generator z G^(i).
+            i = 0
+            for images in self._T_images:
+                if images[point] != point:
+                    i = max(i, self._level(images) + 1)
+            self.base.insert(i, point)
+            self.Sigma.insert(i, {point: self.perm_class()})
+            self.Sigma_inv.insert(i, {point: list(range(self.size))})
+            self._Sigma_words.insert(i, {point: (0, 0)})
+
+    def _drop_trivial_levels(self):
+        """Remove base points with the identity only in Sigma."""
+        # G^(i) == G^(i+1), wiec lancuch bez poziomu i jest poprawny.
+        keep = [i for i, level in enumerate(self.Sigma) if len(level) > 1]
+        if len(keep) == len(self.base):
+            return
+        self.base = [self.base[i] for i in keep]
+        self.Sigma = [self.Sigma[i] for i in keep]
+        self.Sigma_inv = [self.Sigma_inv[i] for i in keep]
+        self._Sigma_words = [self._Sigma_words[i] for i in keep]
 
     def alg_A(self, k, perm):
         """Append the perm to the strong generators."""
-        if perm in self:
-            return
-        j = perm[k]
-        if self.Sigma[k][j] is not None:
-            perm2 = ~self.Sigma[k][j] * perm
-            # Trzeba sie upewnic, jakiego rzedu jest perm.
-            self.alg_A(perm2.max(), perm2)
-            return
-        self.all_T.append(perm)
-        for item in self.all_Sigma:
-            # Trzeba sie upewnic, jakiego rzedu jest perm.
-            perm2 = perm * item
-            self.alg_B(perm2.max(), perm2)
+        self._extend(perm.max() + 1)
+        self._run([("A", perm.list(self.size), None)])
 
     def alg_B(self, k, perm):
         """Update the Sigma."""
-        if perm in self:
-            return
-        j = perm[k]
-        if self.Sigma[k][j] is None:
-            self.Sigma[k][j] = perm
-            self.all_Sigma.append(perm)
-            for item in self.all_T:
-                # Trzeba sie upewnic, jakiego rzedu jest perm.
-                perm2 = item * perm
-                k_max = perm2.max()
-                if k_max != k:
-                    self.alg_A(k_max, perm2)
-                else:
-                    self.alg_B(k_max, perm2)
+        self._extend(perm.max() + 1)
+        self._run([("B", perm.list(self.size), None)])
+
+    def _new_level(self, residue):
+        """Add a base point moved by the residue (fixing the base)."""
+        # Jak w bazie n-1, n-2, ..., 0 wybieramy najwiekszy ruszany punkt.
+        point = max(x for x, y in enumerate(residue) if x != y)
+        self._add_level(point)
+
+    def _run(self, pending):
+        """Run the algorithms A and B (Knuth) with a worklist.
+        pending is a list of tasks (kind, images, word), kind is "A"
+        or "B", images is perm.list(self.size), word is an SLP line.
+        """
+        # Zamiast wzajemnej rekurencji alg_A i alg_B jest lista zadan,
+        # powtorzone zadania pomijamy (klucze w seen). Iloczyny liczymy
+        # na listach, obiekty perm tworzymy tylko dla Sigma i T.
+        seen = set((task[0], images_key(task[1])) for task in pending)
+        track = self._slp is not None
+        while pending:
+            kind, images, word = pending.pop()
+            self.sift_count += 1
+            k = self._level(images)
+            path = list() if track else None
+            k2, residue = self._sift_images(images, path)
+            if k2 < 0:   # perm jest w grupie
+                continue
+            if k2 == len(self.base):   # trzeba dodac punkt do bazy
+                self._new_level(residue)
+            new_tasks = list()
+            if kind == "B" and k2 == k:   # B: nowa pozycja Sigma[k][j]
+                self._store(k, images, word)
+                for item, item_word in zip(self._T_images, self._T_words):
+                    images2 = compose(item, images)
+                    new_tasks.append(
+                        ("B" if self._level(images2) == k else "A", images2,
+                        self._mul(item_word, word) if track else None))
+            else:   # A: reszta po przesianiu trafia do T
+                if track:
+                    word = self._residue_word(path, word)
+                self._append_T(residue, word)
+                for item, item_word in zip(self._Sigma_images,
+                        self._Sigma_flat_words):
+                    new_tasks.append(("B", compose(residue, item),
+                        self._mul(word, item_word) if track else None))
+            self.product_count += len(new_tasks)
+            # Zadania zdejmujemy w tej kolejnosci, w jakiej szla rekurencja.
+            for task in reversed(new_tasks):
+                key = (task[0], images_key(task[1]))
+                if key not in seen:
+                    seen.add(key)
+                    pending.append(task)
+
+    def _store(self, i, images, word=None):
+        """Store the perm (a list of images) as Sigma[i][images[base[i]]]."""
+        j = images[self.base[i]]
+        inv = [0] * len(images)
+        for x, y in enumerate(images):
+            inv[y] = x
+        perm = self.perm_class(data=images)
+        self.Sigma[i][j] = perm
+        self.Sigma_inv[i][j] = inv
+        self._Sigma_words[i][j] = (word, self._inverse_word(word))
+        self.all_Sigma.append(perm)
+        self._Sigma_images.append(images)
+        self._Sigma_flat_words.append(word)
+
+    def _append_T(self, images, word=None):
+        """Append the perm (a list of images) to the strong generators."""
+        self.all_T.append(self.perm_class(data=images))
+        self._T_images.append(images)
+        self._T_words.append(word)
+
+    def _generator_word(self, n=-1):
+        """Return the SLP line for the generator n (or None)."""
+        if self._slp is None:
+            return None
+        self._slp.append(("g", n % len(self.generators)))
+        self._slp_len.append(1)
+        return len(self._slp) - 1
+
+    def _mul(self, word1, word2):
+        """Return the SLP line for the product of words."""
+        if word1 is None or word2 is None or self._slp is None:
+            return None
+        if word1 == 0:   # linia 0 to identycznosc
+            return word2
+        if word2 == 0:
+            return word1
+        self._slp.append(("*", word1, word2))
+        self._slp_len.append(self._slp_len[word1] + self._slp_len[word2])
+        return len(self._slp) - 1
+
+    def _inverse_word(self, word):
+        """Return the SLP line for the inverse of the word."""
+        if word is None or self._slp is None:
+            return None
+        if word == 0:
+            return 0
+        self._slp.append(("~", word))
+        self._slp_len.append(self._slp_len[word])
+        return len(self._slp) - 1
+
+    def _residue_word(self, path, word):
+        """Return the word of the residue ~u_k * ... * ~u_0 * perm
+        (path is a list of pairs of words from _sift_images).
+        """
+        if path is None:
+            return None
+        for word1, inv_word1 in path:
+            word = self._mul(inv_word1, word)
+        return word
+
+    def insert_random(self, perms, error=1e-6, verify=False, seed=None):
+        """Insert the perms with the randomized Schreier-Sims algorithm.
+        The Sigma table is complete with probability about 1 - error
+        (random perms from the product replacement are nearly uniform).
+        If verify is True, all Schreier generators are sifted afterwards
+        and the table is always complete (slower).
+        """
+        rng = random.Random(seed)
+        track = self._slp is not None
+        for perm in perms:
+            self._extend(perm.max() + 1)   # trzeba powiekszyc baze
+            path = list() if track else None
+            k, residue = self._sift(perm, path)
+            self.sift_count += 1
+            if k >= 0:
+                self.generators.append(perm)
+                self._add_strong(residue,
+                    self._residue_word(path, self._generator_word()))
+        # Jesli tablica jest niepelna, to losowa perm z G nie przechodzi
+        # przez sito z p-stwem >= 1/2 (lemat Seressa). Perms losujemy
+        # z generatorow, nie z niepelnej tablicy. Po f porazkach
+        # czekamy na c sukcesow z 0.5**c <= error / 2**(f+1).
+        sampler = self._replacement(rng)
+        successes = 0
+        c = 1
+        while 0.5 ** c > error / 2:
+            c += 1
+        while successes < c and self.generators:
+            images, word = next(sampler)
+            path = list() if track else None
+            k, residue = self._sift_images(images, path)
+            self.sift_count += 1
+            if k < 0:
+                successes += 1
+            else:
+                self._add_strong(residue, self._residue_word(path, word))
+                successes = 0
+                c += 1
+        if verify:
+            self._verify()
+
+    def _replacement(self, rng, slots=10, scramble=50):
+        """The generator for random perms from the group generated by
+        the generators, pairs (images, word), see sampling.ProductReplacement.
+        """
+        # Ten sam wariant "rattle" na listach obrazow, ze slowami.
+        track = self._slp is not None
+        gens = [(perm.list(self.size),
+            self._generator_word(n) if track else None)
+            for n, perm in enumerate(self.generators)]
+        number = max(slots, len(gens), 2)
+        state = [gens[i % len(gens)] for i in range(number)]
+        accumulator = (list(range(self.size)), 0 if track else None)
+        step = 0
+        while True:
+            i = rng.randrange(number)
+            j = rng.randrange(number - 1)
+            if j >= i:
+                j = j + 1
+            images, word = state[j]
+            if rng.random() < 0.5:
+                inv = [0] * self.size
+                for x, y in enumerate(images):
+                    inv[y] = x
+                images, word = inv, self._inverse_word(word)
+            images2, word2 = state[i]
+            if rng.random() < 0.5:
+                state[i] = (compose(images2, images), self._mul(word2, word))
+            else:
+                state[i] = (compose(images, images2), self._mul(word, word2))
+            images, word = accumulator
+            accumulator = (compose(images, state[i][0]),
+                self._mul(word, state[i][1]))
+            self.product_count += 2
+            step += 1
+            if step > scramble:
+                yield accumulator
+
+    def _random_images(self, rng, chain=None, path=None):
+        """Return a random element of the Sigma table (a list of images).
+        The element is uniform if the table is complete. chain is
+        (base, Sigma_inv, Sigma_words), path is as for _sift_images().
+        """
+        if chain is None:
+            chain = (self.base, self.Sigma_inv, self._Sigma_words)
+        # Iloczyn losowych odwrotnosci ~u_m * ... * ~u_0 tez jest losowy,
+        # a listy obrazow odwrotnosci juz mamy.
+        images = list(range(self.size))
+        for point, level, words in zip(*chain):
+            j = rng.choice(list(level))
+            if j != point:   # pomijamy identycznosc
+                images = compose(level[j], images)
+                self.product_count += 1
+                if path is not None:
+                    path.append(words[j])
+        return images
+
+    def _add_strong(self, images, word=None):
+        """Add a strong generator (a residue) and extend orbits."""
+        k = self._level(images)
+        if k == len(self.base):   # trzeba dodac punkt do bazy
+            self._new_level(images)
+        self._append_T(images, word)
+        # Residuum nalezy do stabilizatorow poziomow 0, 1, ..., k.
+        for i in range(k + 1):
+            self._extend_orbit(i, (images, word))
+
+    def _extend_orbit(self, i, new_gen):
+        """Extend the orbit of base[i] in the group fixing base[:i]
+        (new_gen is a pair (images, word)).
+        """
+        level = self.Sigma[i]
+        if len(level) == self.size - i:   # orbita nie moze juz rosnac
             return
-        item = ~self.Sigma[k][j] * perm
-        # Trzeba sie upewnic, jakiego rzedu jest perm.
-        # Tu na pewno k_max < k.
-        self.alg_A(item.max(), item)
+        gens = [(gen, word) for gen, word in zip(self._T_images, self._T_words)
+            if self._level(gen) >= i]
+        fresh = list()
+        # Stare punkty z nowym generatorem, nowe punkty ze wszystkimi.
+        for j in list(level):
+            self._orbit_step(i, j, [new_gen], fresh)
+        for j in fresh:   # lista fresh rosnie w czasie petli
+            self._orbit_step(i, j, gens, fresh)
+
+    def _orbit_step(self, i, j, gens, fresh):
+        """Find Sigma[i][gen[j]] = gen * Sigma[i][j] for new points."""
+        level = self.Sigma[i]
+        rep = None
+        for gen, word in gens:
+            j2 = gen[j]
+            if j2 not in level:
+                if rep is None:
+                    rep = level[j].list(self.size)
+                self._store(i, compose(gen, rep),
+                    self._mul(word, self._Sigma_words[i][j][0]))
+                self.product_count += 1
+                fresh.append(j2)
+
+    def _verify(self):
+        """Sift all Schreier generators (the deterministic Schreier-Sims)."""
+        # Generator Schreiera raz przesiany do identycznosci zostaje w grupie
+        # (Sigma tylko rosnie), wiec klucze (base[i], j, t) pamietamy.
+        changed = True
+        while changed:
+            changed = False
+            for i, level in enumerate(self.Sigma):
+                point = self.base[i]
+                gens = [(t, gen) for t, gen in enumerate(self._T_images)
+                    if self._level(gen) >= i]
+                words = self._Sigma_words[i]
+                for j, perm in list(level.items()):
+                    rep = None
+                    for t, gen in gens:
+                        key = (point, j, t)
+                        if key in self._checked:
+                            continue
+                        self._checked.add(key)
+                        if rep is None:
+                            rep = perm.list(self.size)
+                        # Generator Schreiera ~Sigma[i][gen[j]] * gen * Sigma[i][j].
+                        images = compose(gen, rep)
+                        j2 = images[point]
+                        images = compose(self.Sigma_inv[i][j2], images)
+                        self.product_count += 2
+                        word = None
+                        path = None
+                        if self._slp is not None:
+                            word = self._mul(words[j2][1],
+                                self._mul(self._T_words[t], words[j][0]))
+                            path = list()
+                        k, residue = self._sift_images(images, path)
+                        self.sift_count += 1
+                        if k >= 0:
+                            self._add_strong(residue, self._residue_word(path, word))
+                            changed = True
+
+    def change_base(self, base):
+        """Change the base to start with the given points.
+        The new chain is built from random elements of the old one.
+        """
+        order = self.order()
+        old_chain = (self.base, self.Sigma_inv, self._Sigma_words)
+        old_T = list(zip(self.all_T, self._T_words))
+        rng = random.Random(order)
+        track = self._slp is not None
+        self.base = []
+        self.Sigma = []
+        self.Sigma_inv = []
+        self._Sigma_words = []
+        self.all_Sigma = [self.perm_class()]
+        self.all_T = []
+        self._Sigma_images = [list(range(self.size))]
+        self._Sigma_flat_words = [0]
+        self._T_images = []
+        self._T_words = []
+        self._checked = set()
+        for point in base:
+            self._add_level(point)
+        # Najpierw stare silne generatory, potem losowe elementy grupy,
+        # az do znanego rzedu grupy.
+        for perm, word in old_T:
+            path = list() if track else None
+            k, residue = self._sift(perm, path)
+            self.sift_count += 1
+            if k >= 0:
+                self._add_strong(residue, self._residue_word(path, word))
+        while self.order() < order:
+            path = list() if track else None
+            images = self._random_images(rng, old_chain, path)
+            word = self._residue_word(path, 0)
+            path = list() if track else None
+            k, residue = self._sift_images(images, path)
+            self.sift_count += 1
+            if k >= 0:
+                self._add_strong(residue, self._residue_word(path, word))
+
+    def _copy(self):
+        """Return a copy of the group (the same table, nothing shared
+        that can change in place).
+        """
+        new_group = Group(self.perm_class)
+        new_group.__dict__.update(self.__dict__)
+        new_group.generators = list(self.generators)
+        new_group.base = list(self.base)
+        new_group.Sigma = [dict(level) for level in self.Sigma]
+        new_group.Sigma_inv = [dict((j, list(inv)) for j, inv in level.items())
+            for level in self.Sigma_inv]
+        new_group.all_Sigma = list(self.all_Sigma)
+        new_group.all_T = list(self.all_T)
+        new_group._Sigma_images = [list(images) for images in self._Sigma_images]
+        new_group._T_images = [list(images) for images in self._T_images]
+        new_group._checked = set(self._checked)
+        if self._slp is not None:
+            new_group._slp = list(self._slp)
+        new_group._slp_len = list(self._slp_len)
+        new_group._Sigma_words = [dict(level) for level in self._Sigma_words]
+        new_group._Sigma_flat_words = list(self._Sigma_flat_words)
+        new_group._T_words = list(self._T_words)
+        return new_group
+
+    def pointwise_stabilizer(self, points):
+        """Return the subgroup fixing all the points."""
+        points = list(points)
+        m = len(points)
+        group = self
+        if set(self.base[:m]) != set(points):
+            # Nowa baza na kopii, tablica G (i rank()) bez zmian.
+            group = self._copy()
+            group.change_base(points)
+        # Stabilizator to dalsza czesc lancucha, nic nie przeliczamy.
+        new_group = Group(self.perm_class)
+        new_group._extend(group.size)
+        new_group.base = group.base[m:]
+        new_group.Sigma = [dict(level) for level in group.Sigma[m:]]
+        # Listy obrazow kopiujemy, _extend() wydluza je w miejscu.
+        new_group.Sigma_inv = [dict((j, list(inv)) for j, inv in level.items())
+            for level in group.Sigma_inv[m:]]
+        # Slowa byly w generatorach G, w podgrupie ich nie ma.
+        new_group._Sigma_words = [dict((j, (None, None)) for j in level)
+            for level in new_group.Sigma]
+        for level in new_group.Sigma:
+            for perm in level.values():
+                if not perm.is_identity():
+                    new_group.all_Sigma.append(perm)
+                    new_group._Sigma_images.append(perm.list(group.size))
+                    new_group._Sigma_flat_words.append(None)
+        for perm, images in zip(group.all_T, group._T_images):
+            if group._level(images) >= m:
+                new_group.generators.append(perm)
+                new_group._append_T(list(images))
+        return new_group
+
+    def stabilizer(self, point):
+        """Return a stabilizer subgroup."""
+        return self.pointwise_stabilizer([point])
 
     def iterperms(self):
         """The generator for perms from the group."""
-        a = [0] * self.size
-        while True:
-            # M2. Odwiedziny.
-            if all(self.Sigma[k][a[k]] is not None for k in range(self.size)):
-                perm = Perm()
-                for k in range(self.size):
-                    perm = self.Sigma[k][a[k]] * perm
-                yield perm
-            # M3. Przygotowanie do dodania jedynki.
-            j = self.size - 1
-            # M4. Przeniesienie, jesli trzeba.
-            while a[j] == j and j >= 0:
-                a[j] = 0
-                j = j - 1
-            # M5. Zwiekszenie, o ile nie koniec.
-            if j < 0:
-                break
-            else:
-                a[j] = a[j] + 1
+        # Przechodzimy tylko niepuste poziomy (od ostatniego punktu bazy),
+        # iloczyn czesciowy liczymy raz dla poddrzewa, O(|G|).
+        levels = list()
+        for i in range(len(self.base) - 1, -1, -1):
+            # Identycznosc zapisujemy jako None, nie trzeba jej mnozyc.
+            reps = [(None if j == self.base[i] else perm)
+                for j, perm in self.Sigma[i].items()]
+            if len(reps) > 1:   # poziom z sama identycznoscia pomijamy
+                levels.append(reps)
+        return iter_products(levels, self.perm_class())
+
+    def rank(self, perm):
+        """Return the index of the perm in iterperms(), one sift pass."""
+        # Perm = u_0 * u_1 * ... * u_{m-1}, cyfra d_i to numer u_i
+        # w Sigma[i], rank = d_0 + |Sigma[0]| * (d_1 + |Sigma[1]| * ...).
+        if perm.max() >= self.size:
+            raise ValueError("perm is not in the group")
+        images = perm.list(self.size)
+        digits = list()
+        for point, level, inv_level in zip(self.base, self.Sigma, self.Sigma_inv):
+            j = images[point]
+            inv = inv_level.get(j)
+            if inv is None:
+                raise ValueError("perm is not in the group")
+            digits.append(list(level).index(j))
+            if j != point:
+                images = [inv[x] for x in images]
+        if images != list(range(self.size)):
+            raise ValueError("perm is not in the group")
+        result = 0
+        for digit, level in zip(reversed(digits), reversed(self.Sigma)):
+            result = result * len(level) + digit
+        return result
+
+    def unrank(self, rank):
+        """Return the perm with the given index in iterperms()."""
+        if not 0 <= rank < self.order():
+            raise ValueError("rank out of range")
+        images = list(range(self.size))
+        for level in self.Sigma:
+            rank, digit = divmod(rank, len(level))
+            perm = list(level.values())[digit]
+            if not perm.is_identity():
+                images = compose(images, perm.list(self.size))
+        return self.perm_class(data=images)
+
+    def factor(self, perm):
+        """Return a word [(n, power), ...] in generators for the perm,
+        perm = generators[n]**power * ... (requires Group(words=True)).
+        """
+        if self._slp is None:
+            raise ValueError("words are not tracked")
+        if perm.max() >= self.size:
+            raise ValueError("perm is not in the group")
+        path = list()
+        k, residue = self._sift(perm, path)
+        if k >= 0:
+            raise ValueError("perm is not in the group")
+        # Perm = u_0 * u_1 * ... * u_{m-1}, slowa u_i sa w tablicy.
+        word = 0
+        for word1, inv_word1 in path:
+            word = self._mul(word, word1)
+        if word is None:
+            raise ValueError("no word for the perm")
+        if self._slp_len[word] > MAX_WORD:   # slowa rosna wykladniczo
+            raise ValueError("the word is too long, use shorten_words()")
+        return self._expand(word)
+
+    def _expand(self, word):
+        """Return the SLP line as a reduced list [(n, power), ...]."""
+        # Rozwijamy program bez rekurencji, stos par (linia, znak).
+        # Sasiednie potegi tego samego generatora laczymy modulo rzad,
+        # zera usuwamy (skracanie slowa w locie).
+        orders = [gen.order() for gen in self.generators]
+        result = list()
+        stack = [(word, 1)]
+        while stack:
+            line, sign = stack.pop()
+            item = self._slp[line]
+            if item[0] == "*":
+                if sign > 0:
+                    stack.append((item[2], 1))
+                    stack.append((item[1], 1))
+                else:
+                    stack.append((item[1], -1))
+                    stack.append((item[2], -1))
+            elif item[0] == "~":
+                stack.append((item[1], -sign))
+            elif item[0] == "g":
+                n = item[1]
+                power = sign
+                if result and result[-1][0] == n:
+                    power += result.pop()[1]
+                power = power % orders[n]
+                if 2 * power > orders[n]:   # krotsza potega ujemna
+                    power -= orders[n]
+                if power != 0:
+                    result.append((n, power))
+        return result
+
+    def evaluate(self, word):
+        """Return the perm for the word [(n, power), ...]."""
+        perm = self.perm_class()
+        for n, power in word:
+            perm = perm * pow(self.generators[n], power)
+        return perm
+
+    def shorten_words(self, count=200, length=20, seed=None):
+        """Replace perms in the Sigma table by perms with shorter words.
+        count random words of the given length (with prefixes) are sifted.
+        """
+        # Metoda Minkwitza: perm z krotszym slowem zastepuje
+        # reprezentanta tej samej warstwy, reszta jest przesiewana dalej.
+        if self._slp is None:
+            raise ValueError("words are not tracked")
+        rng = random.Random(seed)
+        gens = list()
+        for n, gen in enumerate(self.generators):
+            word = self._generator_word(n)
+            gens.append((gen.list(self.size), word))
+            gens.append(((~gen).list(self.size), self._inverse_word(word)))
+        if not gens:
+            return
+        for _ in range(count):
+            images = list(range(self.size))
+            word = 0
+            for _ in range(length):
+                gen, gen_word = rng.choice(gens)
+                images = compose(images, gen)
+                word = self._mul(word, gen_word)
+                self._improve(images, word)
+        # Listy dla algorytmow A i B od nowa (te same warstwy).
+        self.all_Sigma = [self.perm_class()]
+        self._Sigma_images = [list(range(self.size))]
+        self._Sigma_flat_words = [0]
+        for point, level, words in zip(self.base, self.Sigma, self._Sigma_words):
+            for j, perm in level.items():
+                if j != point:
+                    self.all_Sigma.append(perm)
+                    self._Sigma_images.append(perm.list(self.size))
+                    self._Sigma_flat_words.append(words[j][0])
+
+    def _improve(self, images, word):
+        """Sift the perm with the word, store shorter words on the way."""
+        mark = len(self._slp)
+        stored = False
+        for i, point in enumerate(self.base):
+            j = images[point]
+            if j == point:
+                continue
+            inv = self.Sigma_inv[i][j]
+            old_word, old_inv_word = self._Sigma_words[i][j]
+            if old_word is None or self._slp_len[word] < self._slp_len[old_word]:
+                self.Sigma[i][j] = self.perm_class(data=images)
+                self.Sigma_inv[i][j] = [0] * self.size
+                for x, y in enumerate(images):
+                    self.Sigma_inv[i][j][y] = x
+                self._Sigma_words[i][j] = (word, self._inverse_word(word))
+                stored = True
+                if old_word is None:
+                    return
+            images = [inv[x] for x in images]   # stary reprezentant
+            word = self._mul(old_inv_word, word)
+            self.product_count += 1
+        if not stored:   # linie pomocnicze nie sa potrzebne
+            del self._slp[mark:]
+            del self._slp_len[mark:]
+
+    def random_element(self, rng=None):
+        """Return a random perm from the group (uniform)."""
+        # Odwrotnosc perm jednostajnej jest jednostajna, a listy obrazow
+        # odwrotnosci juz mamy (jak w _random_images), O(n * poziomy).
+        rng = random if rng is None else rng
+        images = list(range(self.size))
+        for point, level in zip(self.base, self.Sigma_inv):
+            if len(level) > 1:   # poziom z sama identycznoscia pomijamy
+                j = rng.choice(list(level))
+                if j != point:
+                    images = compose(level[j], images)
+        return self.perm_class(data=images)
+
+    def random_elements(self, count, rng=None):
+        """The generator for count random perms from the group (uniform).
+        rng is random.Random (or the random module if None).
+        """
+        rng = random if rng is None else rng
+        for _ in range(count):
+            yield self.random_element(rng)
+
+    def random_batch(self, count, seed=None):
+        """Return a PermBatch of count random perms (requires numpy)."""
+        if np is None:
+            raise ImportError("PermBatch requires numpy")
+        rng = np.random.default_rng(seed)
+        dtype = dtype_for(self.size)
+        data = np.tile(np.arange(self.size, dtype=dtype), (count, 1))
+        for level in self.Sigma:
+            if len(level) > 1:
+                reps = np.array([perm.list(self.size) for perm in level.values()],
+                    dtype=dtype)
+                rows = reps[rng.integers(len(reps), size=count)]
+                data = np.take_along_axis(data, rows, axis=1)   # data * rep
+        return PermBatch(data)
 
     def is_trivial(self):
         """Test if the group is trivial."""
         return self.order() == 1
+
+    def orbits(self, points):
+        """Return a list of orbits."""
+        # Orbity z generatorow, grupy nie przegladamy.
+        return orbit_list(self.generators, points)
+
+    def orbit(self, point):
+        """Return the orbit of the point."""
+        return schreier_vector(self.generators, point)[0]
+
+    def schreier_vector(self, point):
+        """Return the orbit and the Schreier vector of the point."""
+        return schreier_vector(self.generators, point)
+
+    def is_transitive(self, points, strict=True):
+        """Test if the group is transitive (has a single orbit).
+        If strict is False the group is transitive if it has 
+        a single orbit of length different from 1.
+        """
+        if strict:
+            points = list(points)
+            if not points:
+                return False
+            orbit = set(self.orbit(points[0]))
+            return all(pt in orbit for pt in points)
+        else:   # ignorujemy nieruchome punkty
+            number = sum(1 for orbit in self.orbits(points) if len(orbit) > 1)
+            return number == 1
+
+    def action(self, points):
+        """Return a new group induced by the action."""
+        if not self.is_transitive(points):
+            raise TypeError("the group is not transitive on points")
+        new_group = Group(self.perm_class)
+        for perm in action_generators(self.generators, points, self.perm_class):
+            new_group.insert(perm)
+        return new_group
+
+    def iterlabels(self):
+        """The generator for perm labels from the group."""
+        for perm in self.iterperms():
+            yield perm.label()
+
+    def subgroup_search(self, prop, tests=None):
+        """Return a subgroup of all elements satisfying the property.
+        tests(images, i) is False if no perm g with g[b] == images[b]
+        for b in base[:i+1] satisfies prop (optional, for pruning).
+        """
+        # Przeszukiwanie z nawrotami po lancuchu stabilizatorow, od
+        # ostatniego poziomu. Warstwe u_j * G^(l+1) pomijamy, jesli j lezy
+        # na orbicie base[l] w znalezionej podgrupie K (K zawiera wtedy
+        # perm k z k[base[l]] == j i warstwa to k * G^(l+1), juz zbadane).
+        new_group = Group(self.perm_class)
+        levels = list()
+        for point, level in zip(self.base, self.Sigma):
+            levels.append([(None if j == point else perm.list(self.size))
+                for j, perm in level.items()])
+        for l in range(len(self.base) - 1, -1, -1):
+            point = self.base[l]
+            orbit = set(new_group.orbit(point))
+            for j, rep in zip(self.Sigma[l], levels[l]):
+                if j in orbit:
+                    continue
+                perm = self._search(l, rep, levels, prop, tests)
+                if perm is not None:   # reszta warstwy wynika z K
+                    new_group.insert(perm)
+                    orbit = set(new_group.orbit(point))
+        return new_group
+
+    def _search(self, l, rep, levels, prop, tests):
+        """Return a perm from rep * G^(l+1) satisfying prop (or None)."""
+        if tests is not None and not tests(rep, l):
+            return None
+        stack = [(l + 1, rep)]
+        while stack:
+            k, images = stack.pop()
+            if k == len(levels):
+                perm = self.perm_class(data=images)
+                if prop(perm):
+                    return perm
+                continue
+            for rep2 in reversed(levels[k]):
+                # Obrazy base[:k+1] sa juz ustalone (dalsze u fixuja je).
+                images2 = images if rep2 is None else compose(images, rep2)
+                if tests is None or tests(images2, k):
+                    stack.append((k + 1, images2))
+        return None
+
+    def centralizer(self, other):
+        """G.centralizer(H) - return the centralizer of H."""
+        if other.is_trivial() or self.is_trivial():
+            return self
+        size = max([self.size] + [perm.max() + 1 for perm in other.generators])
+        gens = [perm.list(size) for perm in other.generators]
+        index = dict((point, i) for i, point in enumerate(self.base))
+
+        def tests(images, k):
+            # g * h == h * g, czyli g[h[b]] == h[g[b]] dla punktow bazy.
+            for b in self.base[:k+1]:
+                for h in gens:
+                    i = index.get(h[b])
+                    if i is not None and i <= k and images[h[b]] != h[images[b]]:
+                        return False
+            return True
+
+        # Wystarczy przemiennosc z generatorami H.
+        return self.subgroup_search(lambda perm:
+            all(perm.commutes_with(perm2) for perm2 in other.generators), tests)
+
+    def center(self):
+        """Return the center of the group."""
+        return self.centralizer(self)
+
+    def normalizer(self, other):
+        """G.normalizer(H) - return the normalizer of H."""
+        size = max([self.size] + [perm.max() + 1 for perm in other.generators])
+        # Numery orbit H dla wszystkich punktow.
+        orbit_id = [0] * size
+        orbit_len = list()
+        for i, orbit in enumerate(orbit_list(other.generators, range(size))):
+            orbit_len.append(len(orbit))
+            for point in orbit:
+                orbit_id[point] = i
+
+        def tests(images, k):
+            # g permutuje orbity H: b i b2 sa na jednej orbicie wtedy
+            # i tylko wtedy, gdy g[b] i g[b2] sa na jednej orbicie.
+            b = self.base[k]
+            orbit1 = orbit_id[b]
+            orbit2 = orbit_id[images[b]]
+            if orbit_len[orbit1] != orbit_len[orbit2]:
+                return False
+            for b2 in self.base[:k]:
+                if ((orbit_id[b2] == orbit1) !=
+                        (orbit_id[images[b2]] == orbit2)):
+                    return False
+            return True
+
+        # Grupa skonczona, wystarcza generatory H.
+        return self.subgroup_search(lambda perm:
+            all((perm.conjugate(perm2) in other) for perm2 in other.generators),
+            tests)
+
+    def is_abelian(self):
+        """Test if the group is abelian."""
+        # Wystarczy sprawdzic pary generatorow.
+        for i, perm1 in enumerate(self.generators):
+            for perm2 in self.generators[i+1:]:
+                if not perm1.commutes_with(perm2):
+                    return False
+        return True
+
+    def is_subgroup(self, other):
+        """H.is_subgroup(G) - test if H is a subgroup of G."""
+        if other.order() % self.order() != 0:
+            return False
+        # Wystarcza generatory H, przynaleznosc sprawdzamy przesiewaniem.
+        return all(perm in other for perm in self.generators)
+
+    def is_normal(self, other):
+        """H.is_normal(G) - test if H is a normal subgroup of G.
+        For each h in H, g in G, g*h*~g belongs to H.
+        """
+        # Wystarczy sprawdzic generatory H i generatory G.
+        for perm1 in self.generators:
+            for perm2 in other.generators:
+                if perm2.conjugate(perm1) not in self:
+                    return False
+        return True
+
+    def normal_closure(self, other):
+        """Return the normal closure (conjugate closure)."""
+        new_group = Group(self.perm_class)
+        for perm in other.generators:
+            new_group.insert(perm)
+        # Sprzezamy generatory H przez generatory G, az do skutku
+        # (lista new_group.generators rosnie w czasie petli).
+        for perm2 in new_group.generators:
+            for perm1 in self.generators:
+                new_group.insert(perm1.conjugate(perm2))
+        return new_group
+
+    def commutator(self, group1, group2):
+        """Return the commutator of the groups."""
+        # [H, K] to domkniecie normalne w <H, K> komutatorow generatorow.
+        join = Group(self.perm_class)
+        for perm in group1.generators + group2.generators:
+            join.insert(perm)
+        new_group = Group(self.perm_class)
+        for perm1 in group1.generators:
+            for perm2 in group2.generators:
+                new_group.insert(perm1.commutator(perm2))
+        return join.normal_closure(new_group)
+
+    def derived_subgroup(self):
+        """Return the derived subgroup of the group."""
+        return self.commutator(self, self)
+
+    def to_bytes(self):
+        """Return the Sigma table in the binary format (see save())."""
+        reps = list()
+        table = [NONE] * (len(self.base) * self.size)
+        for i, level in enumerate(self.Sigma):
+            for j in level:   # kolejnosc jak w iterperms() i rank()
+                table[i * self.size + j] = len(reps)
+                reps.append((level[j].list(self.size), self.Sigma_inv[i][j]))
+        header = [VERSION, int(self._auto_base), self.size, len(self.base),
+            len(reps), len(self._T_images), len(self.generators)]
+        data = header + self.base + [len(level) for level in self.Sigma] + table
+        for images, inv in reps:
+            data.extend(images)
+        for images, inv in reps:
+            data.extend(inv)
+        for images in self._T_images:
+            data.extend(images)
+        for perm in self.generators:
+            data.extend(perm.list(self.size))
+        return MAGIC + _words(data).tobytes()
+
+    def save(self, path):
+        """Save the Sigma table to a binary file (see FrozenGroup.load)."""
+        with open(path, "wb") as afile:
+            afile.write(self.to_bytes())
+
+    def freeze(self):
+        """Return a read-only copy of the group (FrozenGroup)."""
+        return FrozenGroup(self.to_bytes(), self.perm_class)
+
+    @classmethod
+    def load(cls, path, perm_class=Perm):
+        """Return a group loaded from the file (made by save())."""
+        frozen = FrozenGroup.load(path, perm_class)
+        size = frozen.size
+        new_group = cls(perm_class, base=frozen.base)
+        new_group._auto_base = frozen._auto_base
+        new_group._extend(size)
+        for i, point in enumerate(frozen.base):
+            for k in frozen._level_range(i):
+                images = frozen._reps[k * size:(k+1) * size].tolist()
+                j = images[point]
+                if j == point:
+                    continue
+                perm = perm_class(data=images)
+                new_group.Sigma[i][j] = perm
+                new_group.Sigma_inv[i][j] = frozen._invs[k * size:(k+1) * size].tolist()
+                new_group._Sigma_words[i][j] = (None, None)   # bez slow
+                new_group.all_Sigma.append(perm)
+                new_group._Sigma_images.append(images)
+                new_group._Sigma_flat_words.append(None)
+        for k in range(frozen._t):
+            new_group._append_T(frozen._T[k * size:(k+1) * size].tolist())
+        new_group.generators = frozen.generators
+        frozen.close()
+        return new_group
+
+
+class FrozenGroup(object):
+    """The read-only Sigma table stored in a buffer (e.g. a mapped file).
+    Methods never write, so the group can be shared by threads.
+    """
+
+    def __init__(self, buffer, perm_class=Perm):
+        """Load up a FrozenGroup instance from bytes made by Group.save()."""
+        self.perm_class = perm_class
+        self._buffer = buffer
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("not a simsgroups file")
+        if sys.byteorder == "little" and array(TYPECODE).itemsize == 4:
+            # Tablice pozostaja w buforze, nic nie kopiujemy.
+            words = memoryview(buffer)[len(MAGIC):].cast(TYPECODE)
+        else:
+            words = array(TYPECODE, bytes(buffer[len(MAGIC):]))
+            words.byteswap()
+        self._words = words
+        version, flags, size, m, r, t, g = words[:HEADER]
+        if version != VERSION:
+            raise ValueError("unknown file version {}".format(version))
+        self._auto_base = bool(flags)
+        self.size = size
+        self._t = t
+        start = HEADER
+        self.base = words[start:start + m].tolist()
+        start += m
+        self._level_sizes = words[start:start + m].tolist()
+        start += m
+        # Reprezentanci poziomu i maja kolejne numery od _level_starts[i].
+        self._level_starts = [0]
+        for length in self._level_sizes:
+            self._level_starts.append(self._level_starts[-1] + length)
+        self._table = words[start:start + m * size]
+        start += m * size
+        self._reps = words[start:start + r * size]
+        start += r * size
+        self._invs = words[start:start + r * size]
+        start += r * size
+        self._T = words[start:start + t * size]
+        start += t * size
+        self.generators = [perm_class(data=words[start + k * size:
+            start + (k+1) * size].tolist()) for k in range(g)]
+
+    @classmethod
+    def load(cls, path, perm_class=Perm):
+        """Return a group sharing the memory-mapped file (read-only)."""
+        with open(path, "rb") as afile:
+            buffer = mmap.mmap(afile.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, perm_class)
+
+    def close(self):
+        """Release the buffer (the group is not usable later)."""
+        if isinstance(self._words, memoryview):
+            for view in (self._table, self._reps, self._invs, self._T, self._words):
+                view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __str__(self):
+        """Return a string representation of the group."""
+        return "FrozenGroup() of order {}".format(self.order())
+
+    def order(self):
+        """Return the group order."""
+        result = 1
+        for length in self._level_sizes:
+            result *= length
+        return result
+
+    def is_trivial(self):
+        """Test if the group is trivial."""
+        return self.order() == 1
+
+    def __contains__(self, perm):
+        """Test if the perm belongs to the group (nothing is written)."""
+        if perm.max() >= self.size:   # perm rusza punkt spoza grupy
+            return False
+        size = self.size
+        images = perm.list(size)
+        for i, point in enumerate(self.base):
+            j = images[point]
+            if j == point:
+                continue
+            k = self._table[i * size + j]
+            if k == NONE:
+                return False
+            inv = self._invs[k * size:(k+1) * size].tolist()   # szybsze
+            images = [inv[x] for x in images]
+        return images == list(range(size))
+
+    def contains_batch(self, batch):
+        """Test perms from the PermBatch (return a bool array, numpy)."""
+        size = self.size
+        data = batch.data.astype(np.intp)
+        # Punkty spoza grupy musza byc stale.
+        result = (data[:, size:] == np.arange(size, batch.size)).all(axis=1)
+        if batch.size > size:   # obrazy >= size tylko w zlych wierszach
+            data = np.minimum(data[:, :size], size - 1)
+        elif batch.size < size:
+            tail = np.arange(batch.size, size)
+            data = np.concatenate([data, np.tile(tail, (len(batch), 1))], axis=1)
+        table = np.asarray(self._table).reshape(len(self.base), size)
+        invs = np.asarray(self._invs).reshape(-1, size)
+        for i, point in enumerate(self.base):
+            # Przesiewamy wszystkie wiersze naraz, wiersze spoza grupy
+            # przesiewamy dalej przez identycznosc.
+            k = table[i][data[:, point]]
+            result &= (k != NONE)
+            k = np.where(result, k, table[i][point])
+            data = np.take_along_axis(invs[k], data, axis=1)   # inv * data
+        result &= (data == np.arange(size)).all(axis=1)
+        return result
+
+    def _level_range(self, i):
+        """Return the range of rep numbers for the level i."""
+        return range(self._level_starts[i], self._level_starts[i + 1])
+
+    def _rep(self, k):
+        """Return the images of the rep number k."""
+        return self._reps[k * self.size:(k+1) * self.size]
+
+    def iterperms(self):
+        """The generator for perms from the group (the order of Group)."""
+        levels = list()
+        for i in range(len(self.base) - 1, -1, -1):
+            point = self.base[i]
+            reps = list()
+            for k in self._level_range(i):
+                images = self._rep(k).tolist()
+                reps.append(None if images[point] == point
+                    else self.perm_class(data=images))
+            if len(reps) > 1:
+                levels.append(reps)
+        return iter_products(levels, self.perm_class())
+
+    def rank(self, perm):
+        """Return the index of the perm in iterperms(), one sift pass."""
+        if perm.max() >= self.size:
+            raise ValueError("perm is not in the group")
+        size = self.size
+        images = perm.list(size)
+        digits = list()
+        for i, point in enumerate(self.base):
+            k = self._table[i * size + images[point]]
+            if k == NONE:
+                raise ValueError("perm is not in the group")
+            digits.append(k - self._level_starts[i])
+            if images[point] != point:
+                inv = self._invs[k * size:(k+1) * size].tolist()
+                images = [inv[x] for x in images]
+        if images != list(range(size)):
+            raise ValueError("perm is not in the group")
+        result = 0
+        for digit, length in zip(reversed(digits), reversed(self._level_sizes)):
+            result = result * length + digit
+        return result
+
+    def unrank(self, rank):
+        """Return the perm with the given index in iterperms()."""
+        if not 0 <= rank < self.order():
+            raise ValueError("rank out of range")
+        images = list(range(self.size))
+        for i, length in enumerate(self._level_sizes):
+            rank, digit = divmod(rank, length)
+            rep = self._rep(self._level_starts[i] + digit)
+            images = [images[x] for x in rep]
+        return self.perm_class(data=images)
+
 # EOF
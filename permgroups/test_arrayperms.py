@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+import sys
+import unittest
+from permgroups import perms
+from permgroups.arrayperms import Perm
+from permgroups import groups
+from permgroups import setsgroups
+from permgroups import simsgroups
+
+
+class TestPerm(unittest.TestCase):
+
+    def setUp(self):
+        self.E = Perm()
+        self.R1 = Perm()(0, 1)(2, 3)
+        self.R2 = Perm()(0, 2)(1, 3)
+        self.P1 = Perm()(1, 2)
+        self.H = Perm()(0, 1, 3, 2)
+
+    def test_init(self):
+        self.assertEqual(self.P1, Perm()(*(1, 2)))
+        self.assertEqual(self.P1, Perm(data=[0, 2, 1]))
+        self.assertEqual(Perm(), Perm()(1)(2)) # singletony
+        self.assertEqual(Perm(data=[0, 2, 1, 3, 4]).data.tolist(), [0, 2, 1])
+
+    def test_repr(self):
+        self.assertEqual(repr(self.E), "Perm()")
+        self.assertEqual(repr(self.R1), "Perm()(0, 1)(2, 3)")
+        self.assertEqual(repr(self.H), "Perm()(0, 1, 3, 2)")
+
+    def test_label(self):
+        self.assertEqual(self.E.label(), "0")
+        self.assertEqual(self.E.label(3), "012")
+        self.assertEqual(self.R1.label(), "1032")
+        self.assertEqual(self.P1.label(), "021")
+
+    def test_mul(self):
+        self.assertEqual(self.E * self.E, self.E)
+        self.assertEqual(self.R1 * self.E, self.R1)
+        self.assertEqual(self.R1 * self.R1, self.E)
+        self.assertNotEqual(self.R1 * self.R2, self.E)
+        self.assertEqual(Perm()(2, 3) * Perm()(1, 2), Perm()(1, 3, 2))
+        self.assertEqual(Perm()(1, 2) * Perm()(2, 3), Perm()(1, 2, 3))
+
+    def test_call(self):
+        perm = Perm()
+        self.assertTrue(perm(0, 1) is perm)   # zmiana w miejscu
+        self.assertEqual(perm, Perm()(0, 1))
+        perm(1, 2)
+        self.assertEqual(perm, Perm()(0, 1, 2))
+        perm(0, 2, 1)   # punkty stale na koncu usuwane
+        self.assertEqual(perm, self.E)
+        self.assertEqual(perm.data, self.E.data)
+        self.assertEqual(hash(perm), hash(self.E))
+        perm = Perm()(1, 2)
+        self.assertEqual(perm(), perm)
+        self.assertEqual(perm(5), Perm()(1, 2))
+        self.assertEqual(perm(0, 5).list(), perms.Perm()(1, 2)(0, 5).list())
+
+    def test_invert(self):
+        self.assertEqual(~self.E, self.E)
+        self.assertEqual(~self.R1, self.R1)
+        self.assertNotEqual(~self.H, self.H)
+        self.assertEqual(self.H * ~self.H, self.E)
+
+    def test_commutator(self):
+        alist = [self.E, self.R1, self.R2, self.P1, self.H, Perm()(2, 5, 4)]
+        for p in alist:
+            for q in alist:
+                self.assertEqual(p.conjugate(q), p * q * ~p)
+                self.assertEqual(p.commutator(q), p * q * ~p * ~q)
+                self.assertEqual(p.commutes_with(q), p * q == q * p)
+
+    def test_order_parity(self):
+        self.assertEqual(self.E.order(), 1)
+        self.assertEqual(self.H.order(), 4)
+        self.assertEqual(self.P1.parity(), 1)
+        self.assertEqual(self.R1.parity(), 0)
+        self.assertEqual(self.H.sign(), -1)
+
+    def test_getitem(self):
+        self.assertEqual(self.H[1], 3)
+        self.assertEqual(self.H[8], 8)
+
+    def test_pow(self):
+        self.assertEqual(pow(self.H, 0), self.E)
+        self.assertEqual(pow(self.H, 1), self.H)
+        self.assertEqual(pow(self.H, -1), ~self.H)
+        self.assertEqual(pow(self.H, 3), ~self.H)
+        self.assertEqual(pow(self.H, 4), self.E)
+
+    def test_min_max(self):
+        self.assertEqual(self.E.min(), 0)
+        self.assertEqual(self.E.max(), 0)
+        self.assertEqual(self.P1.min(), 1)
+        self.assertEqual(self.P1.max(), 2)
+
+    def test_list(self):
+        self.assertEqual(self.E.list(), [0])
+        self.assertEqual(self.E.list(4), [0, 1, 2, 3])
+        self.assertEqual(self.P1.list(), [0, 2, 1])
+        self.assertRaises(ValueError, lambda: self.H.list(2))
+
+    def test_lehmer(self):
+        size = 4
+        self.assertEqual(Perm()(0, 3)(1, 2).inversion_vector(size), [3, 2, 1, 0])
+        self.assertEqual(self.R1.rank_lex(size), 7)
+        self.assertEqual(self.H.rank_lex(size), 10)
+        self.assertEqual(Perm.unrank_lex(size, 17), Perm()(0, 2, 1, 3))
+        for rank in range(24):
+            perm = Perm.unrank_mr(size, rank)
+            self.assertEqual(perm.rank_mr(size), rank)
+
+    def test_random(self):
+        alist = Perm.random_batch(10, 5, seed=7)
+        self.assertEqual(alist, list(Perm.random_stream(10, seed=7, count=5)))
+        self.assertEqual([perm.to_perm() for perm in alist],
+            perms.Perm.random_batch(10, 5, seed=7))
+
+    def test_convert(self):
+        dict_perm = perms.Perm()(0, 1, 3, 2)
+        self.assertEqual(Perm.from_perm(dict_perm), self.H)
+        self.assertEqual(self.H.to_perm(), dict_perm)
+        self.assertEqual(self.H.cycles(), dict_perm.cycles())
+
+    def test_hash(self):
+        aset = set([self.E, Perm(data=[0, 1, 2]), self.H, self.H * self.E])
+        self.assertEqual(len(aset), 2)
+
+    def test_key(self):
+        for perm in (self.E, self.H, Perm()(0, 300), Perm()(*range(1000))):
+            self.assertEqual(perm.key(), perm.to_perm().key())
+        self.assertEqual(Perm()(0, 1).key(), b"\x01\x00")
+
+    def test_memory(self):
+        D1 = perms.Perm()(41,43,0,46)(42,45,47,44)(14,22,30,38)(15,23,31,39)(16,24,32,40)
+        dense = dict(enumerate(D1.list(48)))
+        compact = Perm.from_perm(D1)
+        self.assertTrue(3 * (sys.getsizeof(compact) + sys.getsizeof(compact.data))
+            < sys.getsizeof(dense))
+
+    def tearDown(self): pass
+
+
+class TestGroups(unittest.TestCase):
+
+    def setUp(self):
+        self.N = 5
+        self.generators = [Perm()(0, 1), Perm()(*range(self.N))]
+
+    def test_groups(self):
+        G = groups.Group(Perm)
+        for perm in self.generators:
+            G.insert(perm)
+        self.assertEqual(G.order(), 120)
+        self.assertTrue(all(isinstance(perm, Perm) for perm in G.iterperms()))
+        self.assertEqual(G.stabilizer(0).order(), 24)
+
+    def test_setsgroups(self):
+        G = setsgroups.Group(Perm)
+        for perm in self.generators:
+            G.insert(perm)
+        self.assertEqual(G.order(), 120)
+        self.assertTrue(Perm()(1, 2) in G)
+        self.assertEqual(G.subgroup_search(lambda x: x.is_even()).order(), 60)
+
+    def test_simsgroups(self):
+        G = simsgroups.Group(Perm)
+        for perm in self.generators:
+            G.insert(perm)
+        self.assertEqual(G.order(), 120)
+        self.assertTrue(Perm()(1, 2) in G)
+        self.assertEqual(len(set(G.iterperms())), 120)
+
+    def tearDown(self): pass
+
+if __name__== "__main__":
+
+    unittest.main()
+
+# EOF
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import unittest
+from permgroups.perms import Perm
+from permgroups.batchperms import PermBatch, np
+from permgroups import arrayperms
+from permgroups import groups
+from permgroups import setsgroups
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestPermBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.N = 4
+        self.E = Perm()
+        self.R1 = Perm()(0, 1)(2, 3)
+        self.P1 = Perm()(1, 2)
+        self.H = Perm()(0, 1, 3, 2)
+        self.perms = [self.E, self.R1, self.P1, self.H]
+        self.batch = PermBatch.from_perms(self.perms, self.N)
+
+    def test_init(self):
+        self.assertEqual(len(self.batch), 4)
+        self.assertEqual(self.batch.size, self.N)
+        self.assertEqual(self.batch.data.shape, (4, self.N))
+        self.assertEqual(self.batch.to_perms(), self.perms)
+        self.assertEqual(list(self.batch), self.perms)
+        self.assertEqual(self.batch[3], self.H)
+        self.assertEqual(len(self.batch[1:3]), 2)
+        self.assertRaises(ValueError, PermBatch, [0, 1, 2])
+
+    def test_mul(self):
+        self.assertEqual((self.batch * self.H).to_perms(),
+            [perm * self.H for perm in self.perms])
+        self.assertEqual((self.H * self.batch).to_perms(),
+            [self.H * perm for perm in self.perms])
+        batch2 = PermBatch.from_perms([self.H, self.H, self.R1, self.P1], self.N)
+        self.assertEqual((self.batch * batch2).to_perms(),
+            [self.E * self.H, self.R1 * self.H, self.P1 * self.R1, self.H * self.P1])
+        self.assertRaises(ValueError, lambda: self.batch * self.batch[:2])
+
+    def test_outer(self):
+        other = PermBatch.from_perms([Perm()(0, 3), Perm()(1, 2, 3)], self.batch.size)
+        products = self.batch.outer(other)
+        self.assertEqual(products.to_perms(),
+            [perm1 * perm2 for perm2 in other for perm1 in self.perms])
+
+    def test_invert(self):
+        self.assertEqual((~self.batch).to_perms(), [~perm for perm in self.perms])
+        self.assertTrue((self.batch * ~self.batch).is_identity().all())
+
+    def test_eq(self):
+        self.assertEqual((self.batch == self.H).tolist(), [False, False, False, True])
+        self.assertEqual((self.batch != self.batch).tolist(), [False] * 4)
+        self.assertEqual(self.batch.is_identity().tolist(), [True, False, False, False])
+
+    def test_keys(self):
+        batch2 = self.batch.concatenate(self.batch)
+        self.assertEqual(len(set(batch2.keys())), 4)
+        self.assertEqual(len(batch2.unique()), 4)
+        self.assertEqual(self.batch.labels(),
+            [perm.label() for perm in self.perms])
+        self.assertEqual(self.batch.keys(), [perm.key() for perm in self.perms])
+        perms = [Perm(), Perm()(1, 2), Perm()(0, 299)]
+        self.assertEqual(PermBatch.from_perms(perms, 300).keys(),
+            [perm.key() for perm in perms])
+
+    def test_orbit(self):
+        self.assertEqual(self.batch.images(0).tolist(), [0, 1, 0, 1])
+        self.assertEqual(self.batch.orbit(1), [0, 1, 2, 3])
+
+    def test_rank_lex(self):
+        self.assertEqual(self.batch.inversion_vectors().tolist(),
+            [perm.inversion_vector(self.N) for perm in self.perms])
+        self.assertEqual(self.batch.rank_lex().tolist(), [0, 7, 2, 10])
+        self.assertEqual(PermBatch.unrank_lex(self.N, [0, 7, 2, 10]).to_perms(),
+            self.perms)
+        size = 22   # rangi nie mieszcza sie w int64
+        perms = [Perm.unrank_lex(size, rank) for rank in (0, 3 ** 40, 2 ** 69)]
+        batch = PermBatch.from_perms(perms, size)
+        self.assertEqual(batch.rank_lex().tolist(), [0, 3 ** 40, 2 ** 69])
+        self.assertEqual(PermBatch.unrank_lex(size, [0, 3 ** 40, 2 ** 69]).to_perms(),
+            perms)
+        self.assertRaises(ValueError, PermBatch.unrank_lex, 3, [6])
+
+    def test_rank_mr(self):
+        ranks = [perm.rank_mr(self.N) for perm in self.perms]
+        self.assertEqual(self.batch.rank_mr().tolist(), ranks)
+        self.assertEqual(PermBatch.unrank_mr(self.N, ranks).to_perms(), self.perms)
+        size = 30
+        perms = [Perm.random(size) for _ in range(10)]
+        ranks = [perm.rank_mr(size) for perm in perms]
+        self.assertEqual(PermBatch.from_perms(perms, size).rank_mr().tolist(), ranks)
+        self.assertEqual(PermBatch.unrank_mr(size, ranks).to_perms(), perms)
+
+    def test_random(self):
+        size = 6
+        batch = PermBatch.random(size, 100, seed=[1, 2])
+        self.assertEqual(batch.data.shape, (100, size))
+        self.assertTrue(((~batch * batch).is_identity()).all())
+        self.assertTrue((np.sort(batch.data, axis=1) == np.arange(size)).all())
+        self.assertTrue((PermBatch.random(size, 100, seed=[1, 2]) == batch).all())
+        chunks = list(PermBatch.random_stream(size, 25, chunk=10, seed=5))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(len(set(batch.keys())) > 50, True)
+
+    def test_groups(self):
+        for module in (groups, setsgroups):
+            G = module.Group()
+            G.insert(Perm()(0, 1), batch=True)
+            G.insert(Perm()(*range(5)), batch=True)
+            self.assertEqual(G.order(), 120)
+            self.assertTrue(Perm()(2, 4) in G)
+            H = module.Group()
+            H.insert(Perm()(0, 1))
+            H.insert(Perm()(*range(5)))
+            self.assertEqual(set(G.iterperms()), set(H.iterperms()))
+            K = module.Group(arrayperms.Perm)   # klucze jak w PermBatch
+            K.insert(arrayperms.Perm()(0, 1), batch=True)
+            K.insert(arrayperms.Perm()(*range(5)), batch=True)
+            self.assertEqual(K.order(), 120)
+            self.assertTrue(arrayperms.Perm()(2, 4) in K)
+
+    def tearDown(self): pass
+
+if __name__== "__main__":
+
+    unittest.main()
+
+# EOF
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import unittest
+from permgroups.perms import Perm
+from permgroups.orbits import schreier_vector, trace, orbit_list
+from permgroups.orbits import action_generators
+from permgroups.simsgroups import Group
+
+# The Rubik 3x3 generators from test_rubik3sims.py (the full group).
+U1 = Perm()(1,3,8,6)(2,5,7,4)(9,33,25,17)(10,34,26,18)(11,35,27,19)
+L1 = Perm()(33,35,40,38)(34,37,39,36)(1,9,41,32)(4,12,44,29)(6,14,46,27)
+F1 = Perm()(9,11,16,14)(10,13,15,12)(6,17,43,40)(7,20,42,37)(8,22,41,35)
+R1 = Perm()(17,19,24,22)(18,21,23,20)(8,25,0,16)(5,28,45,13)(3,30,43,11)
+B1 = Perm()(25,27,32,30)(26,29,31,28)(3,33,46,24)(2,36,47,21)(1,38,0,19)
+D1 = Perm()(41,43,0,46)(42,45,47,44)(14,22,30,38)(15,23,31,39)(16,24,32,40)
+
+
+class TestOrbits(unittest.TestCase):
+
+    def setUp(self):
+        self.N = 48
+        self.generators = [U1, L1, F1, R1, B1, D1]
+
+    def test_schreier_vector(self):
+        orbit, vector = schreier_vector(self.generators, 1)   # naroznik
+        self.assertEqual(len(orbit), 24)
+        self.assertEqual(set(orbit), set(vector))
+        self.assertEqual(vector[1], -1)
+        for pt in orbit:
+            perm = trace(self.generators, vector, pt, Perm())
+            self.assertEqual(perm[pt], 1)
+            self.assertEqual((~perm)[1], pt)
+        orbit, vector = schreier_vector(self.generators, 2)   # krawedz
+        self.assertEqual(len(orbit), 24)
+
+    def test_orbit_list(self):
+        orbits = orbit_list(self.generators, range(self.N))
+        self.assertEqual(len(orbits), 2)   # narozniki i krawedzie
+        self.assertEqual(sorted(len(orbit) for orbit in orbits), [24, 24])
+        self.assertEqual(orbit_list([], [0, 1]), [[0], [1]])
+
+    def test_action(self):
+        points = schreier_vector(self.generators, 1)[0]
+        perms = action_generators(self.generators, points, Perm)
+        self.assertEqual(len(perms), 6)
+        self.assertTrue(all(perm.max() < 24 for perm in perms))
+        self.assertEqual([perm.order() for perm in perms], [4] * 6)
+
+    def test_simsgroups(self):
+        # Orbity bez wyliczania grupy Sims (tylko dwa generatory).
+        G = Group()
+        G.insert(U1)
+        G.insert(D1)
+        self.assertEqual(G.order(), 16)
+        self.assertEqual(G.orbit(1), [1, 6, 8, 3])
+        self.assertTrue(G.is_transitive([1, 3, 6, 8]))
+        self.assertFalse(G.is_transitive([1, 2]))
+        self.assertEqual(G.action([1, 6, 8, 3]).order(), 4)
+        self.assertRaises(TypeError, G.action, [1, 2])
+
+    def tearDown(self): pass
+
+if __name__== "__main__":
+
+    unittest.main()
+
+# EOF
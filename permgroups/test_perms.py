@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 import unittest
-from permgroups.perms import Perm
+from permgroups.perms import Perm, lehmer_code, lehmer_decode
 
 
 class TestPerm(unittest.TestCase):
@@ -36,6 +36,15 @@ class TestPerm(unittest.TestCase):
         self.assertEqual(self.P1.label(), "021")
         self.assertEqual(self.H.label(), "1302")
 
+    def test_key(self):
+        self.assertEqual(self.E.key(), bytes([0]))
+        self.assertEqual(self.R1.key(), bytes([1, 0, 3, 2]))
+        self.assertEqual(Perm(data=[1, 0, 2, 3]).key(), self.P1(1, 2)(0, 1).key())
+        self.assertNotEqual(self.R1.key(), self.R2.key())
+        perm = Perm()(0, 300)
+        self.assertEqual(len(perm.key()), 2 * 301)   # uint16
+        self.assertNotEqual(perm.key(), Perm()(0, 299).key())
+
     def test_identity(self):
         self.assertTrue(self.E.is_identity())
         self.assertFalse(self.R1.is_identity())
@@ -96,6 +105,29 @@ class TestPerm(unittest.TestCase):
         self.assertEqual(pow(self.H,4), self.E)
         self.assertEqual(pow(self.H,3), ~self.H)
 
+    def test_pow_cycles(self):
+        self.assertEqual(pow(self.H, 2), self.H * self.H)
+        self.assertEqual(pow(self.H, -3), self.H)
+        self.assertEqual(pow(self.H, 10 ** 30 + 1), self.H)
+        self.assertEqual(pow(self.H, -(10 ** 30) - 1), ~self.H)
+        perm = Perm()(0, 1, 2)(3, 4)(5, 6, 7, 8, 9, 10)
+        self.assertEqual(pow(perm, 5), perm * perm * perm * perm * perm)
+        self.assertEqual(pow(perm, perm.order()), self.E)
+
+    def test_cycle_type(self):
+        self.assertEqual(self.E.cycle_type(), ())
+        self.assertEqual(self.R1.cycle_type(), (2, 2))
+        self.assertEqual(Perm()(0, 1)(2, 3, 4, 5).cycle_type(), (4, 2))
+        perm = Perm()(0, 1)
+        self.assertEqual(perm.cycles(), [[0, 1]])
+        self.assertEqual(perm.order(), 2)
+        perm(1, 2)   # zmiana w miejscu kasuje cykle
+        self.assertEqual(perm.cycles(), [[0, 1, 2]])
+        self.assertEqual(perm.cycle_type(), (3,))
+        self.assertEqual(perm.order(), 3)
+        self.assertEqual(perm.parity(), 0)
+        self.assertEqual(repr(perm), "Perm()(0, 1, 2)")
+
     def test_min_max(self):
         self.assertEqual(self.E.min(), 0)  # konwencja
         self.assertEqual(self.E.max(), 0)  # konwencja
@@ -121,6 +153,16 @@ class TestPerm(unittest.TestCase):
         self.assertTrue(self.E.commutes_with(self.H))
         self.assertTrue(self.R1.commutes_with(self.R2))
         self.assertNotEqual(self.H.commutator(self.R1), self.E)
+        self.assertFalse(self.H.commutes_with(self.P1))
+        self.assertFalse(Perm()(1, 2).commutes_with(Perm()(2, 3)))
+        self.assertTrue(Perm()(1, 2).commutes_with(Perm()(3, 4)))
+        perms = [self.E, self.R1, self.R2, self.P1, self.H, Perm()(2, 5, 4)]
+        for p in perms:
+            for q in perms:
+                self.assertEqual(p.conjugate(q), p * q * ~p)
+                self.assertEqual(p.commutator(q), p * q * ~p * ~q)
+                self.assertEqual(p.commutes_with(q), p * q == q * p)
+        self.assertEqual(len(self.H.conjugate(self.H * ~self.H)), 0)
 
     def test_lehmer(self):
         size = 4
@@ -131,6 +173,47 @@ class TestPerm(unittest.TestCase):
         self.assertEqual(self.P1.rank_lex(size), 2)
         self.assertEqual(self.H.rank_lex(size), 10)
         self.assertEqual(Perm.unrank_lex(size, 17), Perm()(0, 2, 1, 3))
+        self.assertRaises(ValueError, Perm.unrank_lex, size, 24)
+        size = 20
+        perm = Perm.random(size)
+        self.assertEqual(Perm.unrank_lex(size, perm.rank_lex(size)), perm)
+        rank = 2 ** 61 + 12345
+        self.assertEqual(Perm.unrank_lex(size, rank).rank_lex(size), rank)
+        alist = Perm.random(100).list(100)
+        self.assertEqual(lehmer_decode(lehmer_code(alist)), alist)
+
+    def test_sparse(self):
+        self.assertEqual(self.H[8], 8)
+        self.assertEqual(self.P1.label(6), "021345")
+        self.assertEqual(self.P1.list(6), [0, 2, 1, 3, 4, 5])
+        self.assertEqual(sorted(self.P1.keys()), [1, 2])   # bez punktow stalych
+        self.assertEqual(sorted(self.H.keys()), [0, 1, 2, 3])
+        self.assertEqual(len(self.R1 * self.R1), 0)
+        self.assertEqual(len(self.R1 * self.R2), 4)
+        self.assertEqual(sorted((self.P1 * self.R1).keys()), [0, 1, 2, 3])
+        self.assertEqual(sorted((~Perm()(5, 7)).keys()), [5, 7])
+        self.assertEqual(len(Perm(data=[0, 1, 2, 3])), 0)
+        self.assertEqual(len(Perm()(1, 2)(1, 2)), 0)
+
+    def test_random(self):
+        size = 10
+        perms = Perm.random_batch(size, 5, seed=123)
+        self.assertEqual(len(perms), 5)
+        self.assertEqual(perms, Perm.random_batch(size, 5, seed=123))
+        self.assertNotEqual(perms, Perm.random_batch(size, 5, seed=124))
+        for perm in perms:
+            self.assertEqual(sorted(perm.list(size)), list(range(size)))
+        stream = Perm.random_stream(size, seed=123)   # nieskonczony
+        self.assertEqual([next(stream) for _ in range(5)], perms)
+
+    def test_mr(self):
+        size = 4
+        for rank in range(24):
+            self.assertEqual(Perm.unrank_mr(size, rank).rank_mr(size), rank)
+        self.assertEqual(self.E.rank_mr(size), 23)
+        size = 2000   # bez rekurencji
+        perm = Perm.random(size)
+        self.assertEqual(Perm.unrank_mr(size, perm.rank_mr(size)), perm)
 
     def test_hash(self):
         aset = set()
@@ -140,6 +223,46 @@ class TestPerm(unittest.TestCase):
         aset.add(self.H)
         aset.add(self.H)  # ignored
         self.assertEqual(len(aset), 2)
+        self.assertTrue(Perm(data=[1, 3, 0, 2, 4]) in aset)
+        self.assertEqual(hash(self.H * self.E), hash(self.H))
+        perm = Perm()(0, 1)
+        old_hash = hash(perm)
+        perm(1, 2)   # zmiana w miejscu
+        self.assertNotEqual(hash(perm), old_hash)
+        self.assertEqual(hash(perm), hash(Perm()(0, 1, 2)))
+        self.assertFalse(self.H == [1, 3, 0, 2])
+
+    def test_setitem(self):
+        perm = Perm()(0, 1)
+        self.assertEqual(perm.order(), 2)
+        hash(perm)
+        perm[0] = 0   # punkty stale nie sa pamietane
+        perm[1] = 1
+        self.assertTrue(perm.is_identity())
+        self.assertEqual(perm, Perm())
+        self.assertEqual(hash(perm), hash(Perm()))
+        self.assertEqual(repr(perm), "Perm()")
+        self.assertEqual(perm.order(), 1)
+        perm.update({0: 2, 2: 0})
+        self.assertEqual(perm, Perm()(0, 2))
+        self.assertEqual(perm.cycle_type(), (2,))
+        perm.update({2: 2, 0: 0})
+        self.assertEqual(perm, Perm())
+        perm = Perm()(0, 1)(2, 3)
+        perm.cycles()
+        del perm[2]
+        del perm[3]
+        self.assertEqual(perm, Perm()(0, 1))
+        self.assertEqual(perm.cycles(), [[0, 1]])
+        self.assertEqual(hash(perm), hash(Perm()(0, 1)))
+        self.assertEqual(perm.pop(0), 1)
+        self.assertEqual(perm.pop(1), 0)
+        self.assertEqual(perm.order(), 1)
+        perm = Perm()(0, 1, 2)
+        self.assertEqual(perm.order(), 3)
+        perm.clear()
+        self.assertEqual(perm.order(), 1)
+        self.assertEqual(hash(perm), hash(Perm()))
 
     def tearDown(self): pass
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import random
 import unittest
 from permgroups.perms import Perm
 from permgroups.simsgroups import Group
@@ -44,6 +45,7 @@ class TestRubikGroup3Center(unittest.TestCase):
         B3 = B1 * B2
         #self.generators = [U1, L1, F1, R1, B1, D1]
         self.generators = [U1, D1]   # order 16
+        self.all_generators = [U1, L1, F1, R1, B1, D1]
         # cwiartki i polowki
         #self.face_turns = [U1, U2, U3, L1, L2, L3, F1, F2, F3, R1, R2, R3, D1, D2, D3, B1, B2, B3]
         self.face_turns = [L1, R1]   # order 16
@@ -69,6 +71,47 @@ class TestRubikGroup3Center(unittest.TestCase):
         #self.assertEqual(self.group.order(), self.order_rubik3) # time 37.520s
         self.assertEqual(self.group.order(), 16)
 
+    def test_full_group(self):   # lista zadan zamiast rekurencji
+        for perm in self.all_generators:
+            self.group.insert(perm)
+        self.assertEqual(self.group.order(), self.order_rubik3)   # time 0.2s
+        self.assertTrue(self.group.sift_count < self.group.product_count)   # bez powtorzen
+        self.assertTrue(self.face_turns[0] * self.quarter_turns[1] in self.group)
+        self.assertFalse(Perm()(1, 3) in self.group)
+
+    def test_insert_many(self):   # wszystkie ruchy naraz
+        face_turns = list()
+        for perm in self.all_generators:
+            face_turns.extend([perm, perm * perm, perm * perm * perm])
+        self.group.insert_many(face_turns)
+        self.assertEqual(self.group.order(), self.order_rubik3)   # time 0.2s
+        group = Group()
+        group.insert_many(reversed(face_turns))   # kolejnosc bez znaczenia
+        self.assertEqual(group.order(), self.order_rubik3)
+        group.insert_many(face_turns)   # juz w grupie
+        self.assertEqual(len(group.generators), 6)
+
+    def test_factor(self):   # rozwiazanie kostki jako slowo w ruchach
+        group = Group(words=True)
+        group.insert_many(self.all_generators)
+        group.shorten_words(seed=1)
+        perm = group.random_element(random.Random(1))
+        word = group.factor(perm)
+        self.assertEqual(group.evaluate(word), perm)
+        self.assertTrue(len(word) < 500)
+        self.assertEqual(group.factor(self.all_generators[2]), [(2, 1)])
+
+    def test_center(self):   # lancuch stabilizatorow, bez wyliczania
+        for perm in self.all_generators:
+            self.group.insert(perm)
+        center = self.group.center()
+        self.assertEqual(center.order(), 2)   # superflip
+        superflip = center.generators[0]
+        self.assertEqual(superflip.cycle_type(), (2,) * 12)
+        self.assertFalse(self.group.is_abelian())
+        self.assertTrue(center.is_normal(self.group))
+        self.assertTrue(center.is_subgroup(self.group))
+
     def tearDown(self): pass
 
 # +----------+
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+from permgroups.perms import Perm
+from permgroups.sampling import ProductReplacement
+from permgroups.simsgroups import Group
+
+
+class TestProductReplacement(unittest.TestCase):
+
+    def setUp(self):
+        self.generators = [Perm()(0, 1), Perm()(0, 1, 2, 3)]   # Sym(4)
+
+    def test_next(self):
+        sampler = ProductReplacement(self.generators, rng=random.Random(1))
+        G = Group()
+        for perm in self.generators:
+            G.insert(perm)
+        perms = [next(sampler) for _ in range(2000)]
+        self.assertTrue(all(perm in G for perm in perms))
+        self.assertEqual(len(set(perms)), 24)
+        sampler2 = ProductReplacement(self.generators, rng=random.Random(1))
+        self.assertEqual(perms[:10], [sampler2.next() for _ in range(10)])
+
+    def test_even(self):
+        generators = [Perm()(0, 1, 2), Perm()(1, 2, 3, 4, 5)]   # Alt(6)
+        sampler = ProductReplacement(generators, rng=random.Random(2))
+        perms = [next(sampler) for _ in range(500)]
+        self.assertTrue(all(perm.is_even() for perm in perms))
+        self.assertTrue(len(set(perms)) > 250)
+
+    def test_trivial(self):
+        sampler = ProductReplacement([])
+        self.assertEqual(next(sampler), Perm())
+
+    def tearDown(self): pass
+
+if __name__== "__main__":
+
+    unittest.main()
+
+# EOF
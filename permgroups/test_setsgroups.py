@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
+import random
 import unittest
 from permgroups.perms import Perm
+from permgroups.batchperms import np
 from permgroups.setsgroups import Group
 
 
@@ -34,6 +36,42 @@ class TestGroupOrbits(unittest.TestCase):
         self.group.insert(Perm()(*range(self.N)))
         self.assertTrue(self.group.is_transitive(points=range(self.N)))
 
+    def test_insert(self):   # algorytm Dimino
+        self.group = Group()
+        self.group.insert(Perm()(0, 1, 2))
+        self.group.insert(Perm()(0, 1, 2) * Perm()(0, 1, 2))   # juz w grupie
+        self.assertEqual(self.group.generators, [Perm()(0, 1, 2)])
+        self.group.insert(Perm()(3, 4))
+        self.assertEqual(self.group.order(), 6)
+        self.group.insert(Perm()(0, 3))
+        self.assertEqual(self.group.order(), 120)
+        self.assertEqual(len(self.group.generators), 3)
+        self.assertTrue(all(perm1 * perm2 in self.group
+            for perm1 in self.group.iterperms()
+            for perm2 in self.group.generators))
+
+    def test_random(self):
+        G = Group()
+        G.insert(Perm()(0, 1, 2))
+        G.insert(Perm()(0, 1))
+        perms = list(G.random_elements(600, random.Random(1)))
+        self.assertTrue(all(perm in G for perm in perms))
+        self.assertEqual(len(set(perms)), 6)
+        self.assertEqual(perms[:10], list(G.random_elements(10, random.Random(1))))
+        self.assertTrue(G.random_element() in G)
+        if np is not None:
+            batch = G.random_batch(100, seed=1)
+            self.assertEqual(len(batch), 100)
+            self.assertTrue(all(perm in G for perm in batch))
+        G.insert(Perm()(3, 4))   # lista do losowania od nowa
+        perms = list(G.random_elements(600, random.Random(1)))
+        self.assertEqual(len(set(perms)), 12)
+        self.assertEqual(G.random_element(random.Random(1)), perms[0])
+        if np is not None:
+            batch = G.random_batch(200, seed=1)
+            self.assertEqual(len(set(batch)), 12)
+            self.assertTrue(all(perm in G for perm in batch))
+
     def test_orbits4(self):
         self.N = 10
         self.group = Group()
@@ -79,7 +117,17 @@ class TestSubgroup(unittest.TestCase):
         self.assertEqual(self.group2.order(), 1)
 
     def test_normalizer(self):
-        pass
+        C4 = Group()
+        C4.insert(Perm()(*range(self.N)))
+        self.assertEqual(self.group1.normalizer(C4).order(), 8)   # D_4
+        V4 = Group()   # grupa Kleina
+        V4.insert(Perm()(0, 1)(2, 3))
+        V4.insert(Perm()(0, 2)(1, 3))
+        self.assertTrue(V4.is_abelian())
+        self.assertTrue(V4.is_normal(self.group1))
+        self.assertEqual(self.group1.normalizer(V4).order(), 24)
+        self.assertEqual(self.group1.centralizer(V4).order(), 4)
+        self.assertEqual(self.group1.normal_closure(C4).order(), 24)
 
     def test_normal_closure(self):
         n = 5
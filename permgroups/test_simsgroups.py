@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 
+import os
+import random
+import tempfile
+import threading
 import unittest
+from functools import reduce
 from permgroups.perms import Perm
-from permgroups.simsgroups import Group
+from permgroups.batchperms import PermBatch, np
+from permgroups.simsgroups import Group, FrozenGroup
 
 
 class TestGroup(unittest.TestCase):
@@ -24,6 +30,305 @@ class TestGroup(unittest.TestCase):
         self.assertEqual(set(self.G.iterperms()),
         set([Perm()(0, 1)(2, 3), Perm(), Perm()(0, 3)(1, 2), Perm()(0, 2)(1, 3)]))
 
+    def test_generators(self):
+        self.assertEqual(self.G.generators, [self.R1, self.R2])
+        self.G.insert(self.R1 * self.R2)   # juz w grupie
+        self.assertEqual(self.G.generators, [self.R1, self.R2])
+        self.assertEqual(Group().generators, [])
+
+    def test_iterperms(self):
+        G = Group()
+        G.insert(Perm()(*range(20)))   # 20! krotek, tylko 20 perms
+        perms = list(G.iterperms())
+        self.assertEqual(len(perms), 20)
+        self.assertEqual(set(perms), set(pow(G.generators[0], i) for i in range(20)))
+        self.assertEqual(list(Group().iterperms()), [Perm()])
+
+    def test_sigma_inv(self):
+        self.G.insert(Perm()(0, 1, 2))
+        self.assertEqual(self.G.order(), 12)
+        for i, point in enumerate(self.G.base):
+            for j, perm in self.G.Sigma[i].items():
+                self.assertEqual(perm[point], j)
+                self.assertEqual(self.G.Sigma_inv[i][j],
+                    (~perm).list(self.G.size))
+        self.assertFalse(Perm()(0, 1) in self.G)
+        self.assertTrue(Perm()(0, 2, 1) in self.G)
+
+    def test_insert_random(self):
+        n = 30
+        G = Group()
+        G.insert_random([Perm()(0, 1), Perm()(*range(n))], seed=1)
+        self.assertEqual(G.order(), reduce(lambda x, y: x * y, range(1, n+1)))
+        self.assertTrue(Perm()(3, 17) in G)
+        # Malo prob, ale sprawdzamy wszystkie generatory Schreiera.
+        H = Group()
+        H.insert_random([Perm()(0, 1, 2), Perm()(*range(n - 1))],
+            error=0.5, verify=True, seed=2)
+        self.assertEqual(H.order() * 2, G.order() // n)   # A_29
+        self.assertFalse(Perm()(0, 1) in H)
+        K = Group()
+        K.insert_random([self.R1, self.R2])
+        self.assertEqual(set(K.iterperms()), set(self.G.iterperms()))
+
+    def test_insert_random_error(self):
+        # Czesc grup losowych moze byc za mala, ale nie wiecej niz error.
+        rng = random.Random(0)
+        failures = 0
+        for seed in range(200):
+            n = rng.randint(6, 10)
+            perms = [pow(Perm.random(n, rng), rng.randint(1, 4))
+                for _ in range(rng.randint(1, 2))]
+            G = Group()
+            G.insert_random(perms, error=0.25, seed=seed)
+            H = Group()
+            H.insert_many(perms)
+            failures += (G.order() != H.order())
+        self.assertTrue(failures < 0.25 * 200)
+
+    def test_base(self):
+        self.assertEqual(self.G.base, [3])   # poziomy z identycznoscia odpadaja
+        G = Group()
+        G.insert(Perm()(0, 6))   # punkty 1, ..., 5 sa stale
+        self.assertEqual(G.base, [6])
+        G.insert(Perm()(*range(7)))
+        self.assertEqual(G.base, [5, 4, 3, 2, 1, 6])   # nowe punkty na poczatku
+        self.assertTrue(all(len(level) > 1 for level in G.Sigma))
+        G.insert_many([Perm()(7, 9)])
+        self.assertEqual(G.order(), 5040 * 2)
+        self.assertFalse(8 in G.base)
+        self.assertEqual(Group().base, [])
+        K = Group()
+        K.insert_random([self.R1, self.R2], seed=1)
+        self.assertEqual(len(K.base), 1)   # grupa regularna, jeden poziom
+        G = Group(base=[0, 1])
+        G.insert(Perm()(*range(20)))
+        self.assertEqual(G.base, [0, 1])
+        self.assertEqual([len(level) for level in G.Sigma], [20, 1])
+        self.assertEqual(G.order(), 20)
+
+    def test_change_base(self):
+        G = Group()
+        G.insert_random([Perm()(0, 1), Perm()(*range(8))], seed=1)
+        perms = set(G.iterperms())
+        G.change_base([5, 2])
+        self.assertEqual(G.base[:2], [5, 2])
+        self.assertEqual(set(G.iterperms()), perms)
+        self.assertTrue(Perm()(3, 7) in G)
+        H = G.pointwise_stabilizer([2, 5])   # baza bez zmian
+        self.assertEqual(G.base[:2], [5, 2])
+        self.assertEqual(H.order(), 720)
+        self.assertTrue(all(perm[2] == 2 and perm[5] == 5
+            for perm in H.iterperms()))
+        self.assertFalse(Perm()(2, 3) in H)
+        self.assertEqual(self.G.stabilizer(0).order(), 1)
+        S = Group()
+        S.insert(Perm()(0, 1))
+        S.insert(Perm()(*range(6)))
+        perm = Perm()(0, 3, 1)(2, 5)
+        base, rank = list(S.base), S.rank(perm)
+        table = S.to_bytes()
+        self.assertEqual(S.stabilizer(2).order(), 120)   # tablica S bez zmian
+        self.assertEqual(S.pointwise_stabilizer([0, 4]).order(), 24)
+        self.assertEqual((S.base, S.rank(perm)), (base, rank))
+        self.assertEqual(S.to_bytes(), table)
+
+    def test_stabilizer_save(self):
+        G = Group()
+        G.insert(Perm()(0, 1))
+        G.insert(Perm()(0, 1, 2, 3))   # Sym(4)
+        H = G.stabilizer(0)
+        H.insert(Perm()(5, 6))   # H rosnie, G bez zmian
+        self.assertEqual(H.order(), 12)
+        self.assertTrue(all(len(inv) == G.size
+            for level in G.Sigma_inv for inv in level.values()))
+        self.assertTrue(all(perm in G.freeze() for perm in G.iterperms()))
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            G.save(path)
+            K = Group.load(path)
+            self.assertEqual(K.order(), 24)
+            self.assertTrue(all(perm in K for perm in G.iterperms()))
+        finally:
+            os.remove(path)
+
+    def test_rank(self):
+        self.G.insert(Perm()(0, 1, 2))
+        perms = list(self.G.iterperms())
+        self.assertEqual([self.G.rank(perm) for perm in perms], list(range(12)))
+        self.assertEqual([self.G.unrank(i) for i in range(12)], perms)
+        self.assertRaises(ValueError, self.G.rank, Perm()(0, 1))
+        self.assertRaises(ValueError, self.G.rank, Perm()(0, 9))
+        self.assertRaises(ValueError, self.G.unrank, 12)
+        G = Group()
+        G.insert_random([Perm()(0, 1), Perm()(*range(40))], seed=1)
+        perm = Perm()(3, 17, 5)(20, 39)
+        self.assertEqual(G.unrank(G.rank(perm)), perm)
+        self.assertEqual(G.rank(G.unrank(10**40)), 10**40)
+
+    def test_insert_many(self):
+        G = Group()
+        cycle = Perm()(*range(6))
+        G.insert_many([cycle, cycle * cycle, Perm()(0, 1), Perm(), ~cycle])
+        self.assertEqual(G.order(), 720)
+        self.assertEqual(G.generators, [cycle, Perm()(0, 1)])
+        self.G.insert_many([Perm()(0, 1, 2), self.R1])
+        self.assertEqual(self.G.order(), 12)
+        self.assertEqual(len(self.G.generators), 3)
+        self.G.insert(Perm()(0, 1))   # dalej algorytm Knutha
+        self.assertEqual(self.G.order(), 24)
+
+    def test_structure(self):
+        G = Group()
+        G.insert(Perm()(0, 1))
+        G.insert(Perm()(*range(5)))   # Sym(5)
+        A = G.subgroup_search(lambda perm: perm.is_even())
+        self.assertEqual(A.order(), 60)
+        self.assertTrue(A.is_subgroup(G))
+        self.assertTrue(A.is_normal(G))
+        self.assertEqual(G.derived_subgroup().order(), 60)
+        self.assertEqual(A.derived_subgroup().order(), 60)
+        self.assertEqual(G.center().order(), 1)
+        self.assertEqual(G.stabilizer(0).order(), 24)
+        self.assertFalse(G.is_abelian())
+        C = Group()
+        C.insert(Perm()(0, 1, 2))
+        self.assertEqual(G.centralizer(C).order(), 6)   # <(0,1,2), (3,4)>
+        self.assertEqual(G.normalizer(C).order(), 12)
+        # Ciecia po orbitach H, bez przegladania 12! perms.
+        S = Group()
+        S.insert(Perm()(0, 1))
+        S.insert(Perm()(*range(12)))
+        self.assertEqual(S.normalizer(C).order(), 6 * 362880)   # S_3 x S_9
+        V = Group()
+        V.insert(Perm()(0, 1)(2, 3))
+        V.insert(Perm()(0, 2)(1, 3))
+        self.assertEqual(S.normalizer(V).order(), 24 * 40320)   # S_4 x S_8
+        for perm in (Perm()(0, 1, 2, 3, 4), Perm()(0, 1)(2, 3)):
+            D = Group()
+            D.insert(perm)
+            self.assertEqual(G.normalizer(D).order(), sum(1 for perm2 in
+                G.iterperms() if perm2.conjugate(perm) in D))
+        self.assertFalse(C.is_normal(G))
+        self.assertEqual(G.normal_closure(C).order(), 60)
+        self.assertEqual(self.G.center().order(), 4)
+        self.assertEqual(self.G.commutator(self.G, self.G).order(), 1)
+        self.assertEqual(len(set(G.iterlabels())), 120)
+
+    def test_random(self):
+        perms = list(self.G.random_elements(400, random.Random(1)))
+        self.assertEqual(set(perms), set(self.G.iterperms()))
+        self.assertEqual(perms[:10],
+            list(self.G.random_elements(10, random.Random(1))))
+        G = Group()
+        G.insert_random([Perm()(0, 1), Perm()(*range(100))], seed=1)
+        perm = G.random_element(random.Random(2))
+        self.assertTrue(perm in G)
+        # Punkt 0 przechodzi w kazdy punkt z tym samym p-stwem.
+        counts = [0] * 4
+        for perm in self.G.random_elements(4000, random.Random(3)):
+            counts[perm[0]] += 1
+        self.assertTrue(all(800 < item < 1200 for item in counts))
+        if np is not None:
+            batch = G.random_batch(50, seed=1)
+            self.assertEqual(len(batch), 50)
+            self.assertTrue(all(perm in G for perm in batch))
+            self.assertTrue(all(perm in self.G
+                for perm in self.G.random_batch(100, seed=1)))
+
+    def test_save_load(self):
+        self.G.insert(Perm()(0, 1, 2))
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.G.save(path)
+            G = Group.load(path)
+            self.assertEqual(G.base, self.G.base)
+            self.assertEqual(G.order(), 12)
+            self.assertEqual(G.generators, self.G.generators)
+            self.assertEqual(G.all_T, self.G.all_T)
+            self.assertEqual(set(G.iterperms()), set(self.G.iterperms()))
+            G.insert(Perm()(0, 1))   # tablica dziala dalej
+            self.assertEqual(G.order(), 24)
+            F = FrozenGroup.load(path)
+            self.assertEqual(F.order(), 12)
+            self.assertEqual(F.base, self.G.base)
+            self.assertTrue(Perm()(0, 2, 1) in F)
+            self.assertFalse(Perm()(0, 1) in F)
+            self.assertFalse(Perm()(0, 7) in F)
+            self.assertEqual(set(F.iterperms()), set(self.G.iterperms()))
+            self.assertEqual([F.rank(perm) for perm in F.iterperms()],
+                list(range(12)))
+            self.assertEqual(list(map(F.unrank, range(12))),
+                list(self.G.iterperms()))
+            F.close()
+        finally:
+            os.remove(path)
+
+    def test_freeze(self):
+        G = Group()
+        G.insert_random([Perm()(0, 1), Perm()(*range(10))], seed=1)
+        F = G.freeze()
+        self.assertEqual(F.order(), G.order())
+        size = G.size
+        self.assertTrue(Perm()(3, 7) in F)
+        self.assertFalse(Perm()(3, 12) in F)   # punkt spoza grupy
+        self.assertFalse(Perm()(3, 12) in G)
+        self.assertEqual(G.size, size)   # __contains__ niczego nie zmienia
+        C = Group()
+        C.insert(Perm()(*range(10)))
+        F = C.freeze()
+        perms = [Perm.random(10, random.Random(i)) for i in range(200)]
+        perms.extend(pow(C.generators[0], i) for i in range(10))
+        expected = [perm in C for perm in perms]
+        results = [None] * 4
+
+        def worker(number):
+            results[number] = [perm in F for perm in perms]
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [expected] * 4)
+        if np is not None:
+            for n in (8, 10, 12):   # krotsze, rowne i dluzsze perms
+                batch = PermBatch.from_perms([perm for perm in perms
+                    if perm.max() < n] + [Perm()(0, n - 1)], n)
+                self.assertEqual(F.contains_batch(batch).tolist(),
+                    [perm in C for perm in batch])
+
+    def test_factor(self):
+        G = Group(words=True)
+        G.insert(Perm()(0, 1))
+        G.insert(Perm()(*range(5)))   # Sym(5)
+        for perm in G.iterperms():
+            word = G.factor(perm)
+            self.assertEqual(G.evaluate(word), perm)
+            # Slowo skrocone: sasiednie generatory rozne, potegi zredukowane.
+            self.assertTrue(all(a[0] != b[0] for a, b in zip(word, word[1:])))
+            self.assertTrue(all(0 < abs(power) <= 2 for n, power in word))
+        self.assertEqual(G.factor(Perm()), [])
+        self.assertEqual(G.factor(Perm()(0, 1)), [(0, 1)])
+        self.assertRaises(ValueError, G.factor, Perm()(0, 7))
+        self.assertRaises(ValueError, self.G.factor, self.R1)   # bez slow
+        H = Group(words=True)
+        H.insert_random([Perm()(0, 1), Perm()(*range(7))], seed=1)
+        H.change_base([4, 6])
+        perms = list(H.random_elements(2, random.Random(1)))   # dlugie slowa
+        self.assertTrue(all(H.evaluate(H.factor(perm)) == perm for perm in perms))
+        length = sum(len(H.factor(perm)) for perm in perms)
+        H.shorten_words(seed=1)
+        self.assertEqual(H.order(), 5040)
+        self.assertTrue(all(H.evaluate(H.factor(perm)) == perm for perm in perms))
+        self.assertTrue(sum(len(H.factor(perm)) for perm in perms) < length)
+        K = Group(words=True)
+        K.insert_many([self.R1, self.R2, self.R1 * self.R2])
+        word = K.factor(self.R1 * self.R2)   # grupa abelowa
+        self.assertEqual(sorted(word), [(0, 1), (1, 1)])
+
     def test_is_trivial(self):
         self.assertTrue(Group().is_trivial())
         self.assertFalse(self.G.is_trivial())